@@ -0,0 +1,25 @@
+from typing import Optional
+from fastapi import Request, Response
+from app.core.config import settings
+
+def _tags(header: str):
+    for tag in header.split(","):
+        tag = tag.strip()
+        yield tag[2:] if tag.startswith("W/") else tag
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response when the client's If-None-Match already names `etag` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    bare = etag[2:] if etag.startswith("W/") else etag
+    if any(tag == "*" or tag == bare for tag in _tags(header)):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
+
+def variant_etag(etag: str, variant: Optional[str]) -> str:
+    """Distinct tag per representation (e.g. ndjson vs the JSON page) of the same listing."""
+    return f'{etag[:-1]}-{variant}"' if variant else etag
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": settings.LIST_CACHE_CONTROL}
@@ -1,4 +1,46 @@
-from app.db.session import SessionLocal
-from app.services.unit_of_work import UnitOfWork
-def uow_factory():
+import inspect
+from functools import partial
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import build_cache
+from app.core.config import settings
+from app.core.storage import build_store
+from app.db.routing import ReadRouter, wal_position
+from app.db.session import engine, SessionLocal, AsyncSessionLocal, ReplicaSessionLocal, AsyncReplicaSessionLocal
+from app.services.listing_cache import ListingCache
+from app.services.logo_service import LogoService, ThumbnailWorker
+from app.services.unit_of_work import UnitOfWork, AsyncUnitOfWork
+
+# Shared by both services so a write in one invalidates listings served by the other.
+# With a replica, writes record the primary's WAL position so loads skip a lagging replica
+listing_cache = ListingCache(
+    build_cache(settings),
+    settings.CACHE_TTL,
+    write_position=partial(wal_position, engine) if settings.DATABASE_REPLICA_URL else None,
+)
+
+# Uploaded logos; the worker's thread pool starts on the first upload
+object_store = build_store(settings)
+thumbnail_worker = ThumbnailWorker(object_store, settings.LOGO_THUMBNAIL_SIZES, settings.LOGO_THUMBNAIL_WORKERS)
+
+# Read-only units of work use the replica (if configured) unless it is down or the client wrote recently
+read_router = ReadRouter(SessionLocal, ReplicaSessionLocal, settings.REPLICA_RETRY_SECONDS)
+async_read_router = ReadRouter(AsyncSessionLocal, AsyncReplicaSessionLocal, settings.REPLICA_RETRY_SECONDS)
+
+def uow_factory(read_only: bool = False):
+    if read_only:
+        return UnitOfWork(read_router.session, read_only=True)
     return UnitOfWork(SessionLocal)
+
+def async_uow_factory(read_only: bool = False):
+    if read_only:
+        return AsyncUnitOfWork(async_read_router.asession, read_only=True)
+    return AsyncUnitOfWork(AsyncSessionLocal)
+
+def logo_service():
+    return LogoService(object_store, thumbnail_worker, settings.LOGO_MAX_BYTES)
+
+async def call_service(fn, *args, **kwargs):
+    """Await async service methods; push sync ones to the threadpool like a plain `def` route."""
+    if inspect.iscoroutinefunction(fn):
+        return await fn(*args, **kwargs)
+    return await run_in_threadpool(fn, *args, **kwargs)
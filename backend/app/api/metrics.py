@@ -0,0 +1,50 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import http_in_flight, http_requests
+
+class MetricsMiddleware:
+    """Records request latency per route template (not raw path, to bound label cardinality)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._templates = {}  # id(route) -> template; routes live as long as the app
+
+    def _template(self, scope: Scope) -> str:
+        # The router leaves the matched route in the (shared) scope. Routes of an included
+        # router may hold their path relative to the include prefix, so recover the prefix
+        # from the request path once per route
+        route = scope.get("route")
+        if route is None or not hasattr(route, "path_regex"):
+            return "<unmatched>"
+        template = self._templates.get(id(route))
+        if template is None:
+            path = scope["path"]
+            template = route.path
+            for i, char in enumerate(path):
+                if char == "/" and route.path_regex.match(path[i:]):
+                    template = path[:i] + route.path
+                    break
+            self._templates[id(route)] = template
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            http_requests.observe(
+                time.perf_counter() - started, method=scope["method"], route=self._template(scope), status=status,
+            )
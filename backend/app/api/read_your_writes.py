@@ -0,0 +1,52 @@
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.db.routing import primary_pinned
+
+COOKIE = "primary_until"
+_WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+class ReadYourWritesMiddleware:
+    """Pins a client's reads to the primary for `window` seconds after each successful write,
+    so a replica that hasn't replayed the write yet can't hide it from the writer.
+
+    The deadline travels in a cookie; only clients that keep cookies (browsers) get this.
+    """
+
+    def __init__(self, app: ASGIApp, window: float):
+        self.app = app
+        self.window = window
+
+    def _pinned(self, scope: Scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                deadline = cookie_parser(value.decode("latin-1")).get(COOKIE)
+                try:
+                    return deadline is not None and float(deadline) > time.time()
+                except ValueError:
+                    return False
+        return False
+
+    def _cookie(self, scope: Scope) -> str:
+        deadline = time.time() + self.window
+        # Cross-site frontends only send cookies marked SameSite=None, which requires Secure
+        site = "SameSite=None; Secure" if scope.get("scheme") == "https" else "SameSite=Lax"
+        return f"{COOKIE}={deadline:.3f}; Max-Age={int(self.window) + 1}; Path=/; HttpOnly; {site}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        is_write = scope["method"] in _WRITE_METHODS
+
+        async def send_with_cookie(message: Message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append("set-cookie", self._cookie(scope))
+            await send(message)
+
+        token = primary_pinned.set(self._pinned(scope))
+        try:
+            await self.app(scope, receive, send_with_cookie if is_write else send)
+        finally:
+            primary_pinned.reset(token)
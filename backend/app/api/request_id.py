@@ -0,0 +1,33 @@
+import re
+import uuid
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.log import request_id_var
+
+HEADER = "X-Request-ID"
+# Accept ids from a proxy/load balancer only if they are short and log-safe
+_VALID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+class RequestIdMiddleware:
+    """Tags each request with an id (the incoming X-Request-ID or a new one) for log correlation."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = dict(scope["headers"]).get(HEADER.lower().encode(), b"").decode("latin-1")
+        request_id = incoming if _VALID.fullmatch(incoming) else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[HEADER] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
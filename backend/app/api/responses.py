@@ -0,0 +1,15 @@
+from typing import Any
+from starlette.responses import Response
+from app.core.serialization import dumps
+
+class PrevalidatedJSONResponse(Response):
+    """JSON for content that already has the route's response_model shape in plain types.
+
+    Returning it from a route skips FastAPI's response_model validation (including
+    EmailStr re-validation) and jsonable_encoder; response_model still documents the route.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,49 +1,94 @@
-from fastapi import APIRouter, HTTPException, Query, File, UploadFile
-from typing import Optional, List
-from app.api.dependencies import uow_factory
-from app.services.cafes_service import CafesService
-from app.domain.schemas import CafeCreate, CafeUpdate, CafeOut
-from pathlib import Path
-import uuid
-import os
+from fastapi import APIRouter, HTTPException, Query, Request, File, UploadFile
+from typing import Optional, List, Literal
+from fastapi.responses import StreamingResponse
+from app.api.caching import not_modified, cache_headers, variant_etag
+from app.api.responses import PrevalidatedJSONResponse
+from app.api.dependencies import uow_factory, async_uow_factory, call_service, listing_cache, logo_service
+from app.core.config import settings
+from app.services.cafes_service import CafesService, AsyncCafesService
+from app.domain.schemas import CafeCreate, CafeUpdate, CafeOut, ImportResult, BulkDeleteRequest
+from app.repositories.pagination import MAX_PAGE_SIZE
+from app.services.bulk_io import MEDIA_TYPES, detect_format, iter_records
 
 router = APIRouter(prefix="/cafes", tags=["cafes"])
-service = CafesService(uow_factory)
+service = (
+    AsyncCafesService(async_uow_factory, listing_cache) if settings.DB_ASYNC
+    else CafesService(uow_factory, listing_cache)
+)
+# Bulk import/export use server-side cursors and savepoints on the sync engine in either mode
+bulk_service = CafesService(uow_factory, listing_cache)
 
 @router.get("", response_model=List[CafeOut])
-def list_cafes(location: Optional[str] = Query(default=None)):
+async def list_cafes(
+    request: Request,
+    location: Optional[str] = Query(default=None),
+    name: Optional[str] = Query(default=None, description="Case-insensitive name prefix"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None, description="Value of X-Next-Cursor from the previous page"),
+    stream: Optional[Literal["json", "ndjson"]] = Query(
+        default=None, description="Stream every matching row (up to limit) as a JSON array or NDJSON; no X-Next-Cursor",
+    ),
+):
+    # Checked before any DB work: an unchanged listing costs one counter lookup
+    etag = variant_etag(service.listing_etag(), stream)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    headers = cache_headers(etag)
+    if stream:
+        # Rows go out in batches as the server-side cursor yields them, never held as a list
+        body = bulk_service.stream(stream, location, name=name, limit=limit, cursor=cursor)
+        return StreamingResponse(body, media_type=MEDIA_TYPES[stream], headers=headers)
     # Invalid location returns empty list implicitly if no records match
-    return service.list(location)
+    items, next_cursor = await call_service(service.list, location, name=name, limit=limit, cursor=cursor)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    # Services build exactly the response_model fields, so skip re-validating 10k+ rows
+    return PrevalidatedJSONResponse(items, headers=headers)
 
 @router.post("", status_code=201)
-def create_cafe(payload: CafeCreate):
-    cafe_id = service.create(payload.model_dump())
+async def create_cafe(payload: CafeCreate):
+    cafe_id = await call_service(service.create, payload.model_dump())
     return {"id": cafe_id}
 
 @router.put("", status_code=200)
-def update_cafe(payload: CafeUpdate):
+async def update_cafe(payload: CafeUpdate):
     try:
-        ok = service.update(payload.model_dump())
+        ok = await call_service(service.update, payload.model_dump())
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     return {"success": ok}
 
 @router.delete("", status_code=200)
-def delete_cafe(id: str):
-    ok = service.delete(id)
+async def delete_cafe(id: str):
+    ok = await call_service(service.delete, id)
     if not ok:
         raise HTTPException(status_code=404, detail="Cafe not found")
     return {"success": True}
 
+@router.post("/delete-many", status_code=200)
+async def delete_cafes(payload: BulkDeleteRequest):
+    # Deletes the cafes and every employee assigned to them
+    return await call_service(service.delete_many, payload.ids)
+
+@router.post("/import", response_model=ImportResult)
+async def import_cafes(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = Query(default=None, description="Defaults to the file extension, then CSV"),
+):
+    fmt = detect_format(format, file.filename, file.content_type)
+    return await call_service(bulk_service.import_rows, iter_records(file.file, fmt))
+
+@router.get("/export")
+async def export_cafes(format: Literal["csv", "ndjson"] = Query(default="csv")):
+    return StreamingResponse(
+        bulk_service.export(format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="cafes.{format}"'},
+    )
+
 @router.post("/upload-logo")
 async def upload_logo(file: UploadFile = File(...)):
-    # Just accept but don't save to disk
-    if file.size > 2 * 1024 * 1024:  # 2MB limit
-        raise HTTPException(status_code=400, detail="File too large")
-    
-    # On Render, files can't be persisted
-    # Just return success - logo feature works locally but not on Render free tier
-    return {
-        "message": "File accepted (not persisted on free tier)",
-        "filename": file.filename
-    }
\ No newline at end of file
+    # The multipart parser spools large bodies to a temp file; this copies it into the
+    # store in chunks, so the image is never held in memory whole
+    return await logo_service().save(file.file)
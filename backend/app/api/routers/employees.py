@@ -1,39 +1,114 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
-from app.api.dependencies import uow_factory
-from app.services.employees_service import EmployeesService
-from app.domain.schemas import EmployeeCreate, EmployeeUpdate, EmployeeOut
+from fastapi import APIRouter, HTTPException, Query, Request, Response, File, UploadFile
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Literal
+from app.api.caching import not_modified, cache_headers, variant_etag
+from app.api.responses import PrevalidatedJSONResponse
+from app.api.dependencies import uow_factory, async_uow_factory, call_service, listing_cache
+from app.core.config import settings
+from app.services.employees_service import EmployeesService, AsyncEmployeesService
+from app.domain.schemas import (
+    EmployeeCreate, EmployeeUpdate, EmployeeOut, ImportResult, BulkDeleteRequest, EmployeeBatchRequest, EmployeeBatchResult,
+)
+from app.repositories.pagination import MAX_PAGE_SIZE
+from app.services.bulk_io import MEDIA_TYPES, detect_format, iter_records
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/employees", tags=["employees"])
-service = EmployeesService(uow_factory)
+service = (
+    AsyncEmployeesService(async_uow_factory, listing_cache) if settings.DB_ASYNC
+    else EmployeesService(uow_factory, listing_cache)
+)
+# Bulk import/export/batch use server-side cursors and savepoints on the sync engine in either mode
+bulk_service = EmployeesService(uow_factory, listing_cache)
 
 @router.get("", response_model=List[EmployeeOut])
-def list_employees(cafe: Optional[str] = Query(default=None)):
-    return service.list(cafe)
+async def list_employees(
+    request: Request,
+    cafe: Optional[str] = Query(default=None),
+    name: Optional[str] = Query(default=None, description="Case-insensitive name prefix"),
+    gender: Optional[Literal["Male", "Female"]] = Query(default=None),
+    location: Optional[str] = Query(default=None, description="Location of the assigned cafe"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None, description="Value of X-Next-Cursor from the previous page"),
+    stream: Optional[Literal["json", "ndjson"]] = Query(
+        default=None, description="Stream every matching row (up to limit) as a JSON array or NDJSON; no X-Next-Cursor",
+    ),
+):
+    # Checked before any DB work: an unchanged listing costs one counter lookup
+    etag = variant_etag(service.listing_etag(), stream)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    headers = cache_headers(etag)
+    if stream:
+        # Rows go out in batches as the server-side cursor yields them, never held as a list
+        body = bulk_service.stream(
+            stream, cafe, name=name, gender=gender, location=location, limit=limit, cursor=cursor
+        )
+        return StreamingResponse(body, media_type=MEDIA_TYPES[stream], headers=headers)
+    items, next_cursor = await call_service(
+        service.list, cafe, name=name, gender=gender, location=location, limit=limit, cursor=cursor
+    )
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    # Services build exactly the response_model fields, so skip re-validating 10k+ rows
+    return PrevalidatedJSONResponse(items, headers=headers)
+
+@router.get("/id-space")
+async def employee_id_space():
+    return await call_service(bulk_service.id_space)
 
 @router.post("", status_code=201)
-def create_employee(payload: EmployeeCreate):
+async def create_employee(payload: EmployeeCreate):
     try:
-        print(payload)
-        emp_id = service.create(payload.model_dump())
+        emp_id = await call_service(service.create, payload.model_dump())
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     return {"id": emp_id}
 
 @router.put("", status_code=200)
-def update_employee(payload: EmployeeUpdate):
+async def update_employee(payload: EmployeeUpdate):
+    logger.debug("Updating employee %s", payload.id, extra={"fields": sorted(payload.model_fields_set - {"id"})})
     try:
-        print(payload)
-        ok = service.update(payload.model_dump())
+        ok = await call_service(service.update, payload.model_dump())
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     return {"success": ok}
 
 @router.delete("", status_code=200)
-def delete_employee(id: str):
-    print(f"Deleting employee {id}")
-    print(id)
-    ok = service.delete(id)
+async def delete_employee(id: str):
+    ok = await call_service(service.delete, id)
     if not ok:
         raise HTTPException(status_code=404, detail="Employee not found")
     return {"success": True}
+
+@router.post("/delete-many", status_code=200)
+async def delete_employees(payload: BulkDeleteRequest):
+    return await call_service(service.delete_many, payload.ids)
+
+@router.post("/batch", response_model=EmployeeBatchResult)
+async def batch_employees(payload: EmployeeBatchRequest, response: Response):
+    """Many creates/updates/transfers/deletes in one transaction; a rolled-back atomic batch is a 409."""
+    operations = [op.model_dump(exclude_unset=True) for op in payload.operations]
+    result = await call_service(bulk_service.apply_batch, operations, atomic=payload.mode == "atomic")
+    if not result["committed"]:
+        response.status_code = 409
+    return result
+
+@router.post("/import", response_model=ImportResult)
+async def import_employees(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = Query(default=None, description="Defaults to the file extension, then CSV"),
+):
+    fmt = detect_format(format, file.filename, file.content_type)
+    return await call_service(bulk_service.import_rows, iter_records(file.file, fmt))
+
+@router.get("/export")
+async def export_employees(format: Literal["csv", "ndjson"] = Query(default="csv")):
+    return StreamingResponse(
+        bulk_service.export(format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="employees.{format}"'},
+    )
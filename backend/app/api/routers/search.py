@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Query
+from typing import Optional, List, Literal
+from app.api.responses import PrevalidatedJSONResponse
+from app.api.dependencies import uow_factory, async_uow_factory, call_service
+from app.core.config import settings
+from app.domain.schemas import SearchHit
+from app.repositories.pagination import MAX_PAGE_SIZE
+from app.services.search_service import SearchService, AsyncSearchService
+
+router = APIRouter(prefix="/search", tags=["search"])
+service = AsyncSearchService(async_uow_factory) if settings.DB_ASYNC else SearchService(uow_factory)
+
+@router.get("", response_model=List[SearchHit])
+async def search(
+    q: str = Query(min_length=1, max_length=200, description="Words to look up; each matches as a word prefix"),
+    type: Optional[Literal["cafe", "employee"]] = Query(default=None, description="Only this kind of result"),
+    limit: int = Query(default=20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None, description="Value of X-Next-Cursor from the previous page"),
+):
+    # Best match first: name matches outrank email/location, which outrank description
+    items, next_cursor = await call_service(service.search, q, type=type, limit=limit, cursor=cursor)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return PrevalidatedJSONResponse(items, headers=headers)
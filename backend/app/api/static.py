@@ -0,0 +1,25 @@
+import os
+import re
+from pathlib import PurePath
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+# Stored uploads are named after the SHA-256 of their content, so a URL never changes meaning
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}(-\d+)?\.[a-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+class UploadsStaticFiles(StaticFiles):
+    """Serves UPLOAD_DIR; content-addressed files are cached by browsers and CDNs for a year."""
+
+    async def get_response(self, path: str, scope: Scope):
+        # Hidden entries (the store's .staging area) are never served
+        if any(part.startswith(".") for part in PurePath(path).parts):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if _CONTENT_ADDRESSED.match(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE
+        return response
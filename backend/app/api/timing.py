@@ -0,0 +1,52 @@
+import logging
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.db import query_stats
+
+logger = logging.getLogger("app.requests")
+
+class QueryStatsMiddleware:
+    """Collects per-request DB statistics, sends them as Server-Timing and logs one line per request.
+
+    Plain ASGI rather than BaseHTTPMiddleware so the context variable set here is the
+    one route handlers (and their threadpool workers) see. Queries issued while a
+    streaming body is sent come after the headers, so only the log line includes them.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = query_stats.RequestQueryStats()
+        token = query_stats.activate(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats.deactivate(token)
+            logger.info(
+                "%s %s %s", scope["method"], scope["path"], status,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    **stats.as_log_fields(),
+                },
+            )
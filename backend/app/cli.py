@@ -0,0 +1,108 @@
+"""Operational commands. These run once per deploy (or by hand), never in the web workers.
+
+    python -m app.cli init [--no-seed]       migrate, then load sample data into an empty database
+    python -m app.cli migrate [REVISION]     alembic upgrade (default: head)
+    python -m app.cli seed [--cafes N --employees N --seed S --workers W] [--replace]
+    python -m app.cli reconcile [--dry-run]  repair cafes.employee_count drift
+    python -m app.cli check-plans            fail if a hot query stops using its index
+"""
+import argparse
+import logging
+import sys
+from app.core.config import settings
+from app.core.log import configure_logging
+
+logger = logging.getLogger("app.cli")
+
+def _cafe_count() -> int:
+    from app.db.session import SessionLocal
+    from app.domain.models import Cafe
+
+    db = SessionLocal()
+    try:
+        return db.query(Cafe).count()
+    finally:
+        db.close()
+
+def _seed(args) -> int:
+    from app.seed import seed_database, seed_scaled
+
+    existing = _cafe_count()
+    if existing and not args.replace:
+        # Both seeders start by deleting everything
+        logger.error("Database already has %d cafes; pass --replace to delete all data and reseed", existing)
+        return 1
+    if args.cafes is None:
+        seed_database()
+    else:
+        seed_scaled(args.cafes, args.employees, args.seed, workers=args.workers, batch_size=args.batch_size)
+    return 0
+
+def _init(args) -> int:
+    from app.db import migrations
+    from app.seed import seed_database
+
+    migrations.upgrade()
+    if args.no_seed:
+        return 0
+    existing = _cafe_count()
+    if existing:
+        logger.info("Database already has %d cafes, skipping seed", existing)
+    else:
+        logger.info("Database is empty, seeding with sample data")
+        seed_database()
+    return 0
+
+def _migrate(args) -> int:
+    from app.db import migrations
+
+    migrations.upgrade(args.revision)
+    return 0
+
+def _reconcile(args) -> int:
+    from app.reconcile import reconcile
+
+    reconcile(args.dry_run)
+    return 0
+
+def _check_plans(args) -> int:
+    from app.plan_check import check_plans
+
+    return 1 if check_plans() else 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init", help="Migrate to head, then seed sample data if there are no cafes")
+    init.add_argument("--no-seed", action="store_true", help="Only migrate")
+    init.set_defaults(run=_init)
+
+    migrate = commands.add_parser("migrate", help="Apply migrations")
+    migrate.add_argument("revision", nargs="?", default="head")
+    migrate.set_defaults(run=_migrate)
+
+    seed = commands.add_parser("seed", help="Replace all data with sample or generated data")
+    seed.add_argument("--cafes", type=int, help="Generate this many cafes instead of the sample data")
+    seed.add_argument("--employees", type=int, default=0)
+    seed.add_argument("--seed", type=int, default=0, help="Random seed for generated data")
+    seed.add_argument("--workers", type=int, help="Loader processes (default: CPUs, at most 8)")
+    seed.add_argument("--batch-size", type=int, default=50_000, help="Rows per COPY transaction")
+    seed.add_argument("--replace", action="store_true", help="Allow deleting existing data")
+    seed.set_defaults(run=_seed)
+
+    reconcile = commands.add_parser("reconcile", help="Recompute cafes.employee_count and repair drift")
+    reconcile.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+    reconcile.set_defaults(run=_reconcile)
+
+    check_plans = commands.add_parser("check-plans", help="EXPLAIN the hot queries and check their indexes")
+    check_plans.set_defaults(run=_check_plans)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging(settings)
+    return args.run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import json
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+from app.core.config import Settings
+
+class CacheBackend(ABC):
+    """Minimal key/value store used by the read-through listing cache.
+
+    Values must be JSON-serializable so a shared store (Redis) can hold them.
+    Counters (incr/get_counter) are never evicted by the LRU/TTL policy.
+    """
+
+    # True when every worker process sees the same entries and counters
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        """Store `value` for `ttl` seconds; None keeps it until it is overwritten (or evicted)."""
+
+    @abstractmethod
+    def incr(self, key: str) -> int: ...
+
+    @abstractmethod
+    def get_counter(self, key: str) -> int: ...
+
+class NullCache(CacheBackend):
+    """Caches nothing, but still keeps revision counters for ETags."""
+
+    def __init__(self):
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+class InMemoryCache(CacheBackend):
+    """Per-process LRU with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl if ttl is not None else math.inf, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+class RedisCache(CacheBackend):
+    """Shared cache for multi-worker deployments; needs the `redis` package."""
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "gic:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        px = int(ttl * 1000) if ttl is not None else None
+        self._client.set(self._prefix + key, json.dumps(value, default=str), px=px)
+
+    def incr(self, key):
+        return int(self._client.incr(self._prefix + key))
+
+    def get_counter(self, key):
+        raw = self._client.get(self._prefix + key)
+        return int(raw) if raw is not None else 0
+
+def build_cache(settings: Settings) -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(settings.CACHE_REDIS_URL)
+    if settings.CACHE_BACKEND == "memory":
+        return InMemoryCache(settings.CACHE_MAX_ENTRIES)
+    return NullCache()
@@ -0,0 +1,119 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from app.core.config import Settings
+
+# Set per request by RequestIdMiddleware; "-" outside a request
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed via extra= and is emitted as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request_id and any extra= fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id on the record; must run in the logging thread, not the listener."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class DebugRateLimitFilter(logging.Filter):
+    """Token bucket per call site for DEBUG records: at most `per_second` pass, the rest are
+    dropped and counted in `suppressed` on the next record that gets through."""
+
+    def __init__(self, per_second: float):
+        super().__init__()
+        self._rate = per_second
+        self._buckets: dict = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self._rate <= 0:
+            return True
+        site = (record.name, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, dropped = self._buckets.get(site, (self._rate, now, 0))
+            tokens = min(self._rate, tokens + (now - last) * self._rate)
+            if tokens < 1:
+                self._buckets[site] = (tokens, now, dropped + 1)
+                return False
+            self._buckets[site] = (tokens - 1, now, 0)
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() bakes the traceback into the message; keep it separate for JSON
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging(settings: Settings):
+    """Route all logging through a queue so request threads never block on the output stream.
+
+    Formatting and writing happen on the listener thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    stream = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+    handler = _QueueHandler(queue.SimpleQueue())
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(DebugRateLimitFilter(settings.LOG_DEBUG_RATE_LIMIT))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+def restart_after_fork(settings: Settings):
+    """In a worker forked after configure_logging ran (gunicorn preload): the listener thread
+    did not survive the fork, so records would pile up in the queue. Start a new one."""
+    global _listener
+    if _listener is not None:
+        atexit.unregister(_listener.stop)
+        _listener = None
+    configure_logging(settings)
@@ -0,0 +1,13 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder gives the same output
+    orjson = None
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes for plain JSON types (dict/list/str/int/float/bool/None)."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
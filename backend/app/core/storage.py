@@ -0,0 +1,90 @@
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+from app.core.config import Settings
+
+class ObjectStore(ABC):
+    """Write-once blob store addressed by '/'-separated keys.
+
+    Callers stage content in a local file first (see staging_file) so it can be hashed
+    and validated before it gets a key; put_file then hands it to the store.
+    """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def put_file(self, key: str, path: Path) -> None:
+        """Store the staged file at `path` under `key`; the store takes ownership of it."""
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes) -> None: ...
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO: ...
+
+    @abstractmethod
+    def url(self, key: str) -> str: ...
+
+    @contextmanager
+    def staging_file(self) -> Iterator[Path]:
+        """A temporary local file to write an upload into; removed on exit unless stored."""
+        fd, name = tempfile.mkstemp(prefix="upload-")
+        os.close(fd)
+        try:
+            yield Path(name)
+        finally:
+            Path(name).unlink(missing_ok=True)
+
+class LocalFileStore(ObjectStore):
+    """Files under `root`, served by the StaticFiles mount at `url_prefix`."""
+
+    def __init__(self, root: str, url_prefix: str):
+        self.root = Path(root).resolve()
+        self._url_prefix = url_prefix.rstrip("/")
+        # Staged on the same filesystem, so put_file is an atomic rename and readers
+        # never see a half-written file
+        self._staging = self.root / ".staging"
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def exists(self, key):
+        return self._path(key).is_file()
+
+    def put_file(self, key, path):
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, target)
+
+    def put_bytes(self, key, data):
+        with self.staging_file() as staged:
+            staged.write_bytes(data)
+            self.put_file(key, staged)
+
+    def open(self, key):
+        return self._path(key).open("rb")
+
+    def url(self, key):
+        return f"{self._url_prefix}/{key}"
+
+    @contextmanager
+    def staging_file(self):
+        self._staging.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(prefix="upload-", dir=self._staging)
+        os.close(fd)
+        try:
+            yield Path(name)
+        finally:
+            Path(name).unlink(missing_ok=True)
+
+def build_store(settings: Settings) -> ObjectStore:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalFileStore(settings.UPLOAD_DIR, settings.UPLOAD_URL_PREFIX)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
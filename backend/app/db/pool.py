@@ -0,0 +1,173 @@
+import threading
+import time
+from typing import Any, Dict, Iterable
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, NullPool
+from app.core.config import Settings
+from app.db import query_stats
+
+class PoolStats:
+    """Running counters for one engine's pool; survives engine.dispose() via recreate()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidated = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def incr(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidated": self.invalidated,
+                "wait_ms_total": round(self.wait_total * 1000, 3),
+                "wait_ms_avg": round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+            }
+
+class _InstrumentedPool:
+    """Times every checkout (queueing + connect) and counts pool timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.incr("timeouts")
+            raise
+        waited = time.perf_counter() - started
+        self.stats.record_wait(waited)
+        query_stats.record_pool_wait(waited)
+        return conn
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+class InstrumentedNullPool(_InstrumentedPool, NullPool):
+    pass
+
+def engine_options(settings: Settings, is_async: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for create_engine/create_async_engine built from Settings."""
+    if settings.DB_EXTERNAL_POOLER:
+        # PgBouncer (transaction mode) owns pooling; hold no idle connections and
+        # skip server-side prepared statements, which don't survive connection hand-off
+        return {
+            "poolclass": InstrumentedNullPool,
+            "connect_args": {"prepare_threshold": None},
+        }
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "always",
+    }
+
+def instrument(engine, settings: Settings):
+    """Attach connect/invalidate counters and the idle pre-ping strategy to a sync Engine."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        engine.pool.stats.incr("connects")
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        engine.pool.stats.incr("invalidated")
+
+    if settings.DB_POOL_PRE_PING != "idle" or settings.DB_EXTERNAL_POOLER:
+        return
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        # Only ping connections that sat idle long enough to have been dropped by
+        # the server or a firewall; hot connections skip the extra round trip
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < settings.DB_POOL_PRE_PING_IDLE:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as e:
+            # The pool discards this connection and retries the checkout with a new one
+            raise exc.DisconnectionError() from e
+        finally:
+            cursor.close()
+
+def pool_status(engine) -> Dict[str, Any]:
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_s": pool.timeout(),
+        })
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
+
+# pool_status() key -> (metric name, type, help)
+_POOL_METRICS = {
+    "size": ("db_pool_size", "gauge", "Configured number of persistent connections."),
+    "checked_out": ("db_pool_checked_out", "gauge", "Connections currently in use."),
+    "checked_in": ("db_pool_checked_in", "gauge", "Idle connections held by the pool."),
+    "overflow": ("db_pool_overflow", "gauge", "Connections open beyond pool_size."),
+    "checkouts": ("db_pool_checkouts_total", "counter", "Connections handed out by the pool."),
+    "timeouts": ("db_pool_timeouts_total", "counter", "Checkouts that gave up after pool_timeout."),
+    "connects": ("db_pool_connects_total", "counter", "New DBAPI connections opened."),
+    "invalidated": ("db_pool_invalidated_total", "counter", "Connections discarded as broken."),
+    "wait_ms_total": ("db_pool_wait_seconds_total", "counter", "Total time spent waiting for a connection."),
+}
+
+def register_pool_metrics(registry, engines: Dict[str, Any]):
+    """Expose pool_status() of each engine (keyed by label) as metrics, read at scrape time.
+
+    Registering again (a second create_app() in the same process) replaces the collectors.
+    """
+
+    def collector(key: str) -> Iterable:
+        def collect():
+            for name, engine in engines.items():
+                value = pool_status(engine).get(key)
+                if value is not None:
+                    yield {"engine": name}, value / 1000 if key == "wait_ms_total" else value
+        return collect
+
+    for key, (metric, kind, doc) in _POOL_METRICS.items():
+        registry.collected(metric, doc, kind, collector(key), replace=True)
@@ -0,0 +1,114 @@
+import logging
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+from sqlalchemy import event
+from app.core.config import Settings
+
+logger = logging.getLogger("app.db.queries")
+
+# Statement kinds Postgres can EXPLAIN without executing them
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+class RequestQueryStats:
+    """Database work done on behalf of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record_query(self, statement: str, seconds: float):
+        self.count += 1
+        self.db_time += seconds
+        if seconds > self.slowest_time:
+            self.slowest_time = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self, total: float) -> str:
+        metrics = [
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.count} queries"',
+            f"db-slowest;dur={self.slowest_time * 1000:.2f}",
+            f"pool-wait;dur={self.pool_wait * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ]
+        return ", ".join(metrics)
+
+    def as_log_fields(self) -> dict:
+        return {
+            "db_queries": self.count,
+            "db_ms": round(self.db_time * 1000, 2),
+            "db_slowest_ms": round(self.slowest_time * 1000, 2),
+            "db_slowest_statement": self.slowest_statement,
+            "pool_wait_ms": round(self.pool_wait * 1000, 2),
+        }
+
+# Set by the request middleware; copied into threadpool workers along with the rest of the context
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+def activate(stats: RequestQueryStats) -> Token:
+    return _current.set(stats)
+
+def deactivate(token: Token):
+    _current.reset(token)
+
+def current() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+def record_pool_wait(seconds: float):
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait += seconds
+
+def _explain(dbapi_connection, statement: str, parameters) -> Optional[str]:
+    # Runs inside the request's transaction: a savepoint keeps a failing EXPLAIN
+    # from aborting it
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute("EXPLAIN " + statement, parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            plan = f"<EXPLAIN failed: {e}>"
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    except Exception:
+        logger.debug("could not EXPLAIN slow query", exc_info=True)
+        return None
+    finally:
+        cursor.close()
+
+def install(engine, settings: Settings):
+    """Time every statement on a sync Engine, attribute it to the current request and
+    log statements slower than SLOW_QUERY_MS (with their plan when SLOW_QUERY_EXPLAIN)."""
+    threshold = settings.SLOW_QUERY_MS / 1000 if settings.SLOW_QUERY_MS > 0 else None
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record_query(statement, elapsed)
+        if threshold is None or elapsed < threshold:
+            return
+        plan = None
+        if settings.SLOW_QUERY_EXPLAIN and not executemany and statement.lstrip()[:6].lower().startswith(_EXPLAINABLE):
+            plan = _explain(conn.connection.dbapi_connection, statement, parameters)
+        logger.warning(
+            "slow query (%.1f ms): %s", elapsed * 1000, statement,
+            extra={"duration_ms": round(elapsed * 1000, 2), "statement": statement, "plan": plan},
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+from sqlalchemy import exc, text
+
+logger = logging.getLogger(__name__)
+
+# Set per request (ReadYourWritesMiddleware) for a client that wrote recently: its reads
+# skip the replica, which may not have replayed that write yet
+primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
+# Set around reads that must see every write up to a primary WAL position (see
+# ListingCache.consistent_reads): a replica that hasn't replayed that far is skipped
+replica_floor: ContextVar[Optional[str]] = ContextVar("replica_floor", default=None)
+
+# NULL when the server isn't in recovery, i.e. isn't behind anything
+_REPLAYED = text("SELECT coalesce(pg_last_wal_replay_lsn() >= CAST(:position AS pg_lsn), true)")
+
+def wal_position(engine) -> str:
+    """The primary's current WAL position (pg_current_wal_lsn)."""
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT pg_current_wal_lsn()::text")).scalar()
+
+class ReadRouter:
+    """Session factory for read-only units of work: the replica when one is configured,
+    reachable, caught up to replica_floor and the request isn't pinned to the primary;
+    the primary otherwise.
+
+    A replica that fails to connect is skipped for `retry_after` seconds, so an outage
+    costs one failed connect per interval instead of one per request.
+    """
+
+    def __init__(self, primary: Callable, replica: Optional[Callable] = None, retry_after: float = 30.0):
+        self._primary = primary
+        self._replica = replica
+        self._retry_after = retry_after
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    def _use_replica(self) -> bool:
+        return self._replica is not None and not primary_pinned.get() and time.monotonic() >= self._down_until
+
+    def _replica_failed(self, e: Exception):
+        with self._lock:
+            self._down_until = time.monotonic() + self._retry_after
+        logger.warning("Replica unavailable, reading from the primary for %.0fs: %s", self._retry_after, e)
+
+    def session(self):
+        if self._use_replica():
+            session = self._replica()
+            try:
+                # Check out a connection now, while falling back is still possible
+                session.connection()
+                floor = replica_floor.get()
+                if floor is None or session.execute(_REPLAYED, {"position": floor}).scalar():
+                    return session
+                session.close()
+            except exc.OperationalError as e:
+                session.close()
+                self._replica_failed(e)
+        return self._primary()
+
+    async def asession(self):
+        if self._use_replica():
+            session = self._replica()
+            try:
+                await session.connection()
+                floor = replica_floor.get()
+                if floor is None or (await session.execute(_REPLAYED, {"position": floor})).scalar():
+                    return session
+                await session.close()
+            except exc.OperationalError as e:
+                await session.close()
+                self._replica_failed(e)
+        return self._primary()
@@ -1,10 +1,58 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db import query_stats
+from app.db.pool import engine_options, instrument
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings))
+instrument(engine, settings)
+query_stats.install(engine, settings)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+def _replica_options(is_async: bool = False):
+    options = engine_options(settings, is_async)
+    options["connect_args"] = {**options.get("connect_args", {}), "connect_timeout": settings.REPLICA_CONNECT_TIMEOUT}
+    return options
+
+# Read-only units of work go here when a replica is configured (app.db.routing)
+replica_engine = None
+ReplicaSessionLocal = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_engine(settings.DATABASE_REPLICA_URL, **_replica_options())
+    instrument(replica_engine, settings)
+    query_stats.install(replica_engine, settings)
+    ReplicaSessionLocal = sessionmaker(bind=replica_engine, autoflush=False, autocommit=False)
+
+# The async engines are only built when enabled so sync deployments don't hold a second pool
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    # postgresql+psycopg resolves to psycopg's async driver under create_async_engine
+    async_engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings, is_async=True))
+    instrument(async_engine.sync_engine, settings)
+    query_stats.install(async_engine.sync_engine, settings)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async_replica_engine = None
+AsyncReplicaSessionLocal = None
+if settings.DB_ASYNC and settings.DATABASE_REPLICA_URL:
+    async_replica_engine = create_async_engine(settings.DATABASE_REPLICA_URL, **_replica_options(is_async=True))
+    instrument(async_replica_engine.sync_engine, settings)
+    query_stats.install(async_replica_engine.sync_engine, settings)
+    AsyncReplicaSessionLocal = async_sessionmaker(bind=async_replica_engine, autoflush=False, expire_on_commit=False)
+
+def dispose_after_fork():
+    """In a forked worker: start with empty pools. close=False leaves the parent's
+    connections alone instead of closing sockets the parent still uses."""
+    for sync_engine in (engine, replica_engine):
+        if sync_engine is not None:
+            sync_engine.dispose(close=False)
+    for async_db in (async_engine, async_replica_engine):
+        if async_db is not None:
+            async_db.sync_engine.dispose(close=False)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -1,14 +1,39 @@
 import uuid
 from datetime import date
 from sqlalchemy import (
-    Column, String, Date, Enum, ForeignKey, UniqueConstraint,
-    CheckConstraint, Integer
+    Column, Computed, String, Date, Enum, ForeignKey, UniqueConstraint,
+    CheckConstraint, Integer, Index, Sequence, func, text
 )
-from sqlalchemy.dialects.postgresql import UUID, CHAR
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.dialects.postgresql import UUID, CHAR, TSVECTOR
+from sqlalchemy.orm import declarative_base, deferred, relationship
 
 Base = declarative_base()
 
+# Employee ids are UI + 7 digits; the sequence hands out the digits, so ids are
+# unique under concurrency without probing the table first
+EMPLOYEE_ID_CAPACITY = 9_999_999
+employee_id_seq = Sequence(
+    "employee_id_seq", minvalue=1, maxvalue=EMPLOYEE_ID_CAPACITY, cycle=False, metadata=Base.metadata
+)
+EMPLOYEE_ID_DEFAULT = "'UI' || lpad(nextval('employee_id_seq')::text, 7, '0')"
+
+def _weighted_tsvector(weighted_columns):
+    """setweight(to_tsvector('simple', col), 'A') || ... with every constant inlined, as a
+    generated column expression must be."""
+    parts = [
+        func.setweight(func.to_tsvector(text("'simple'"), column), text(f"'{weight}'"))
+        for column, weight in weighted_columns
+    ]
+    document = parts[0]
+    for part in parts[1:]:
+        document = document.op("||")(part)
+    return document
+
+def _email_parts(email_address):
+    # The parser keeps an address as one token (only prefixes of the whole address would
+    # match), so it is indexed as its parts: 'bob.chen@gmail.com' -> bob, chen, gmail, com
+    return func.regexp_replace(email_address, text("'[@._+-]+'"), text("' '"), text("'g'"))
+
 class Cafe(Base):
     __tablename__ = "cafes"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -16,25 +41,57 @@ class Cafe(Base):
     description = Column(String(256), nullable=True)
     logo_url = Column(String(512), nullable=True)
     location = Column(String(100), nullable=False)
+    # Denormalized count(employee_cafe) for this cafe; written only by the statement-level
+    # triggers on employee_cafe (migrations/versions/0002)
+    employee_count = Column(Integer, nullable=False, server_default=text("0"))
+    # /api/search document, kept up to date by Postgres (migrations/versions/0005). Ranking
+    # reads it instead of re-parsing the text of every match; deferred, so loading a Cafe
+    # doesn't fetch it.
+    search_document = deferred(Column(TSVECTOR, Computed(_weighted_tsvector([
+        (name, "A"), (location, "B"), (func.coalesce(description, text("''")), "C"),
+    ]), persisted=True)))
 
     employees = relationship(
         "EmployeeCafe",
         back_populates="cafe",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True,  # rely on ON DELETE CASCADE instead of loading the rows
+    )
+
+    __table_args__ = (
+        # The cafe listing order (employee_count desc, id), unfiltered and per location
+        Index("ix_cafes_employee_count_id", employee_count.desc(), "id"),
+        Index("ix_cafes_location_employee_count_id", "location", employee_count.desc(), "id"),
+        Index("ix_cafes_search", "search_document", postgresql_using="gin"),
     )
 
 class Employee(Base):
     __tablename__ = "employees"
-    id = Column(CHAR(9), primary_key=True)               # e.g., UIXXXXXXX
+    id = Column(CHAR(9), primary_key=True, server_default=text(EMPLOYEE_ID_DEFAULT))  # e.g., UIXXXXXXX
     name = Column(String(100), nullable=False)
     email_address = Column(String(320), nullable=False, unique=True)
     phone_number = Column(String(20), nullable=False)
     gender = Column(Enum("Male", "Female", name="gender"), nullable=False)
+    # Copy of employee_cafe.start_date (NULL while unassigned), written only by the triggers on
+    # employee_cafe (migrations/versions/0006), so the listing's tenure order is one index
+    start_date = Column(Date, nullable=True)
+    # /api/search document, as on Cafe
+    search_document = deferred(Column(TSVECTOR, Computed(_weighted_tsvector([
+        (name, "A"), (_email_parts(email_address), "B"),
+    ]), persisted=True)))
 
     cafe_rel = relationship("EmployeeCafe", back_populates="employee", uselist=False)
 
     __table_args__ = (
         CheckConstraint("char_length(id)=9", name="employee_id_len_9"),
+        Index("ix_employees_search", "search_document", postgresql_using="gin"),
+        # The listing order (start_date asc, unassigned last, id) as a plain row comparison
+        Index("ix_employees_tenure", func.coalesce(start_date, text("'infinity'::date")), "id"),
+        # ?name= prefix filter: lower(name) LIKE 'ali%' becomes an index range
+        Index(
+            "ix_employees_name_prefix", func.lower(name).label("name_lower"),
+            postgresql_ops={"name_lower": "text_pattern_ops"},
+        ),
     )
 
 class EmployeeCafe(Base):
@@ -48,4 +105,11 @@ class EmployeeCafe(Base):
 
     __table_args__ = (
         UniqueConstraint("employee_id", name="uq_employee_one_cafe"),
+        # Serves ?cafe= filtering and tenure ordering (start_date asc) in one range scan
+        Index("ix_employee_cafe_cafe_id_start_date", "cafe_id", "start_date"),
     )
+
+# What /api/search matches and ranks against; 'simple' keeps names as written: no
+# stemming or stop words
+EMPLOYEE_SEARCH_DOCUMENT = Employee.__table__.c.search_document
+CAFE_SEARCH_DOCUMENT = Cafe.__table__.c.search_document
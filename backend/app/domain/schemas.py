@@ -1,6 +1,6 @@
 from datetime import date
-from typing import Optional
-from pydantic import BaseModel, EmailStr, field_validator
+from typing import Annotated, Literal, Optional, Union
+from pydantic import BaseModel, EmailStr, Field, field_validator
 
 PHONE_MSG = "Phone must start with 8 or 9 and be 8 digits (SG format)."
 
@@ -10,6 +10,11 @@ def validate_phone(v: str) -> str:
         raise ValueError(PHONE_MSG)
     return v
 
+def validate_gender(v: str) -> str:
+    if v not in ("Male", "Female"):
+        raise ValueError("Gender must be Male or Female.")
+    return v
+
 def validate_emp_id(v: str) -> str:
     import re
     if not re.fullmatch(r"UI\d{7}", v):
@@ -46,6 +51,7 @@ class EmployeeCreate(BaseModel):
     start_date: Optional[date] = None
 
     _v_phone = field_validator("phone_number")(validate_phone)
+    _v_gender = field_validator("gender")(validate_gender)
 
 class EmployeeUpdate(BaseModel):
     id: str
@@ -58,6 +64,7 @@ class EmployeeUpdate(BaseModel):
 
     _v_id = field_validator("id")(validate_emp_id)
     _v_phone = field_validator("phone_number")(validate_phone)
+    _v_gender = field_validator("gender")(validate_gender)
 
 class EmployeeOut(BaseModel):
     id: str
@@ -67,3 +74,68 @@ class EmployeeOut(BaseModel):
     gender: str
     days_worked: int
     cafe: str | None
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+class ImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[ImportRowError]
+
+class BulkDeleteRequest(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=1000)
+
+
+class EmployeeCreateOp(EmployeeCreate):
+    op: Literal["create"]
+
+class EmployeeUpdateOp(EmployeeUpdate):
+    op: Literal["update"]
+
+class EmployeeTransferOp(BaseModel):
+    op: Literal["transfer"]
+    id: str
+    cafe_id: Optional[str]  # null unassigns
+    start_date: Optional[date] = None
+
+    _v_id = field_validator("id")(validate_emp_id)
+
+class EmployeeDeleteOp(BaseModel):
+    op: Literal["delete"]
+    id: str
+
+    _v_id = field_validator("id")(validate_emp_id)
+
+EmployeeBatchOp = Annotated[
+    Union[EmployeeCreateOp, EmployeeUpdateOp, EmployeeTransferOp, EmployeeDeleteOp], Field(discriminator="op")
+]
+
+class EmployeeBatchRequest(BaseModel):
+    # atomic: any failure rolls back the whole batch; per_item: failures are skipped
+    mode: Literal["atomic", "per_item"] = "atomic"
+    operations: list[EmployeeBatchOp] = Field(min_length=1, max_length=1000)
+
+class BatchItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[str]
+    status: Literal["ok", "failed", "rolled_back"]
+    error: Optional[str] = None
+
+class EmployeeBatchResult(BaseModel):
+    mode: str
+    committed: bool
+    applied: int
+    failed: int
+    results: list[BatchItemResult]
+
+class SearchHit(BaseModel):
+    type: Literal["cafe", "employee"]
+    id: str
+    name: str
+    score: float
+    email_address: Optional[str] = None  # employees
+    cafe: Optional[str] = None           # employees: the cafe they work at
+    location: Optional[str] = None       # cafes
@@ -1,52 +1,42 @@
 from contextlib import asynccontextmanager
-import os
-import sys
-from pathlib import Path
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-import logging
-
-# Add app directory to Python path so seed can be imported
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import logging
 from app.core.config import settings
-from app.db.session import SessionLocal, engine
-from app.domain.models import Base, Cafe
-from app.api.routers import cafes, employees
+from app.core.log import configure_logging
+from app.db.session import engine, async_engine, replica_engine, async_replica_engine
+from app.db.pool import pool_status, register_pool_metrics
+from app.core.metrics import registry
+from app.api.routers import cafes, employees, search
 from app.api.errors import register_handlers
-
-# NOW import seed (after path is set up)
-from seed import seed_database
+from app.api.timing import QueryStatsMiddleware
+from app.api.compression import CompressionMiddleware
+from app.api.request_id import RequestIdMiddleware
+from app.api.metrics import MetricsMiddleware
+from app.api.read_your_writes import ReadYourWritesMiddleware
+from app.api.static import UploadsStaticFiles
+from app.api.dependencies import thumbnail_worker
 
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Startup and shutdown events."""
-    
-    print("[Startup] Checking if database needs seeding...")
-    db = SessionLocal()
-    try:
-        cafe_count = db.query(Cafe).count()
-        if cafe_count == 0:
-            print("[Startup] Database is empty. Seeding with sample data...")
-            seed_database()
-            print("[Startup] Seeding complete!")
-        else:
-            print(f"[Startup] Database already has {cafe_count} cafes. Skipping seed.")
-    except Exception as e:
-        logger.error(f"[Startup] Error during seeding check: {e}")
-    finally:
-        db.close()
-    
+    """Shutdown only: migrations and seeding run before the server (python -m app.cli init),
+    so a worker starts without touching the database and connects on first use."""
     yield
     
-    print("[Shutdown] Application shutting down...")
+    logger.info("Application shutting down")
+    thumbnail_worker.shutdown()
+    for async_db in (async_engine, async_replica_engine):
+        if async_db is not None:
+            await async_db.dispose()
 
 
 def create_app() -> FastAPI:
+    configure_logging(settings)
     app = FastAPI(
         title="GIC Cafe/Employee API",
         version="1.0.0",
@@ -63,27 +53,84 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Server-Timing", "X-Request-ID"],
     )
+    if settings.COMPRESSION:
+        # Inside the timing and metrics middlewares, so their numbers include compression
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_BYTES,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+    if settings.DATABASE_REPLICA_URL:
+        app.add_middleware(ReadYourWritesMiddleware, window=settings.READ_YOUR_WRITES_SECONDS)
+    # Outside CORS, compression and the routes, so its timings cover them; only the
+    # request id and metrics middlewares below wrap it
+    app.add_middleware(QueryStatsMiddleware, server_timing=settings.SERVER_TIMING)
+    # Outside the stats middleware so its per-request log line carries the request id
+    app.add_middleware(RequestIdMiddleware)
+    # Outermost
+    app.add_middleware(MetricsMiddleware)
 
     register_handlers(app)
 
-    try:
-        Base.metadata.create_all(bind=engine)
-        print("[Startup] Database tables created or verified.")
-    except Exception as e:
-        print(f"[Startup] Skipped metadata.create_all: {e}")
-
     app.include_router(cafes.router, prefix=settings.API_PREFIX)
     app.include_router(employees.router, prefix=settings.API_PREFIX)
+    app.include_router(search.router, prefix=settings.API_PREFIX)
     
-    uploads_path = Path("uploads")
-    if uploads_path.exists() and uploads_path.is_dir():
-        app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+    # The directory may not exist until the first upload creates it
+    app.mount(settings.UPLOAD_URL_PREFIX, UploadsStaticFiles(directory=settings.UPLOAD_DIR, check_dir=False), name="uploads")
     
     @app.get("/health", tags=["system"])
     def health():
         return {"status": "ok"}
 
+    schema_current = False
+
+    @app.get("/ready", tags=["system"])
+    def ready():
+        """Readiness: the database answers and is at the head migration (checked once per worker)."""
+        nonlocal schema_current
+        try:
+            if schema_current:
+                with engine.connect() as connection:
+                    connection.exec_driver_sql("SELECT 1")
+            else:
+                # Alembic is only needed here, so keep it off the import path of every worker
+                from app.db import migrations
+
+                current, head = migrations.current_revision(engine), migrations.head_revision()
+                if current != head:
+                    return JSONResponse(
+                        {"status": "unavailable", "reason": f"schema at revision {current}, expected {head}"},
+                        status_code=503,
+                    )
+                schema_current = True
+        except Exception as e:
+            logger.warning("Readiness check failed: %s", e)
+            return JSONResponse({"status": "unavailable", "reason": "database unreachable"}, status_code=503)
+        return {"status": "ready"}
+
+    pool_engines = {"sync": engine}
+    if async_engine is not None:
+        pool_engines["async"] = async_engine.sync_engine
+    if replica_engine is not None:
+        pool_engines["replica"] = replica_engine
+    if async_replica_engine is not None:
+        pool_engines["async_replica"] = async_replica_engine.sync_engine
+    register_pool_metrics(registry, pool_engines)
+
+    @app.get("/metrics", tags=["system"], response_class=PlainTextResponse)
+    def metrics():
+        # Prometheus text format, for this worker process only
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @app.get("/metrics/pool", tags=["system"])
+    def pool_metrics():
+        # Per-process numbers; with several workers, scrape each one or sum them
+        return {name: pool_status(pool_engine) for name, pool_engine in pool_engines.items()}
+
     return app
 
 
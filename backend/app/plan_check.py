@@ -0,0 +1,101 @@
+"""Assert that the hot queries are planned as index scans on the indexes meant for them.
+
+    python -m app.cli check-plans
+
+Runs EXPLAIN with enable_seqscan off, so small or empty tables (CI, a fresh database)
+still show which index the planner can use.
+"""
+import json
+import logging
+import uuid
+from datetime import date
+from typing import Callable, Iterator, List, NamedTuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+from app.domain.models import Employee
+from app.repositories.cafes_repo import CafesRepo
+from app.repositories.employees_repo import EmployeesRepo
+from app.repositories.search_repo import SearchRepo, prefix_tsquery
+
+logger = logging.getLogger(__name__)
+
+class PlanCheck(NamedTuple):
+    name: str
+    index: str
+    build: Callable[[Session], object]   # -> the statement, built as the repository builds it
+
+_CAFE = uuid.UUID(int=1)
+
+CHECKS = [
+    PlanCheck("cafes: listing", "ix_cafes_employee_count_id",
+              lambda db: CafesRepo(db)._list_with_counts_stmt(None, None, 51, None)),
+    PlanCheck("cafes: listing, next page", "ix_cafes_employee_count_id",
+              lambda db: CafesRepo(db)._list_with_counts_stmt(None, None, 51, (5, _CAFE))),
+    PlanCheck("cafes: ?location=", "ix_cafes_location_employee_count_id",
+              lambda db: CafesRepo(db)._list_with_counts_stmt("Singapore", None, 51, None)),
+    PlanCheck("cafes: ?location=, next page", "ix_cafes_location_employee_count_id",
+              lambda db: CafesRepo(db)._list_with_counts_stmt("Singapore", None, 51, (5, _CAFE))),
+    PlanCheck("employees: listing", "ix_employees_tenure",
+              lambda db: EmployeesRepo(db)._list_with_days_and_cafe_stmt(None, None, None, None, 51, None)),
+    PlanCheck("employees: listing, next page", "ix_employees_tenure",
+              lambda db: EmployeesRepo(db)._list_with_days_and_cafe_stmt(
+                  None, None, None, None, 51, (date(2024, 1, 1), "UI0000001"))),
+    PlanCheck("employees: listing, unassigned page", "ix_employees_tenure",
+              lambda db: EmployeesRepo(db)._list_with_days_and_cafe_stmt(
+                  None, None, None, None, 51, (None, "UI0000001"))),
+    PlanCheck("employees: ?gender=", "ix_employees_tenure",
+              lambda db: EmployeesRepo(db)._list_with_days_and_cafe_stmt(None, None, "Female", None, 51, None)),
+    PlanCheck("employees: ?location=", "ix_employees_tenure",
+              lambda db: EmployeesRepo(db)._list_with_days_and_cafe_stmt(None, None, None, "Singapore", 51, None)),
+    # A selective prefix; for a common one walking ix_employees_tenure is just as good
+    PlanCheck("employees: ?name=", "ix_employees_name_prefix",
+              lambda db: EmployeesRepo(db)._list_with_days_and_cafe_stmt(None, "Victoria Ch", None, None, 51, None)),
+    PlanCheck("employees: ?cafe=", "ix_employee_cafe_cafe_id_start_date",
+              lambda db: EmployeesRepo(db)._list_with_days_and_cafe_stmt(_CAFE, None, None, None, 51, None)),
+    PlanCheck("employees: ?cafe=, next page", "ix_employee_cafe_cafe_id_start_date",
+              lambda db: EmployeesRepo(db)._list_with_days_and_cafe_stmt(
+                  _CAFE, None, None, None, 51, (date(2024, 1, 1), "UI0000001"))),
+    PlanCheck("cafe delete: staff lookup", "ix_employee_cafe_cafe_id_start_date",
+              lambda db: CafesRepo(db)._delete_staff_stmt([_CAFE])),
+    PlanCheck("employees: email uniqueness check", "employees_email_address_key",
+              lambda db: select(Employee.id).where(Employee.email_address == "a@example.com")),
+    PlanCheck("search: employees", "ix_employees_search",
+              lambda db: SearchRepo(db)._search_stmt("'ali':*", ("cafe", "employee"), 21, None)),
+    PlanCheck("search: employee email fragment", "ix_employees_search",
+              lambda db: SearchRepo(db)._search_stmt(prefix_tsquery("chen@gmail"), ("employee",), 21, None)),
+    PlanCheck("search: cafes", "ix_cafes_search",
+              lambda db: SearchRepo(db)._search_stmt("'ali':*", ("cafe", "employee"), 21, None)),
+]
+
+def _index_names(plan: dict) -> Iterator[str]:
+    if "Index Name" in plan:
+        yield plan["Index Name"]
+    for child in plan.get("Plans", ()):
+        yield from _index_names(child)
+
+def explain(db: Session, stmt) -> dict:
+    compiled = stmt.compile(dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True})
+    row = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    return (json.loads(row) if isinstance(row, str) else row)[0]["Plan"]
+
+def check_plans() -> List[str]:
+    """Run every check; returns the names of the ones whose plan doesn't use their index."""
+    failures = []
+    db = SessionLocal()
+    try:
+        # SET LOCAL: scoped to this transaction, which is rolled back below
+        db.execute(select(1))
+        db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for check in CHECKS:
+            indexes = set(_index_names(explain(db, check.build(db))))
+            if check.index in indexes:
+                logger.info("ok   %s: %s", check.name, check.index)
+            else:
+                logger.error("FAIL %s: expected %s, plan uses %s", check.name, check.index,
+                             ", ".join(sorted(indexes)) or "no index")
+                failures.append(check.name)
+    finally:
+        db.rollback()
+        db.close()
+    return failures
@@ -0,0 +1,25 @@
+"""Recompute cafes.employee_count from employee_cafe and repair any drift.
+
+    python -m app.cli reconcile [--dry-run]
+"""
+import logging
+from app.db.session import SessionLocal
+from app.repositories.cafes_repo import CafesRepo
+
+logger = logging.getLogger(__name__)
+
+def reconcile(dry_run: bool = False) -> int:
+    db = SessionLocal()
+    try:
+        drift = CafesRepo(db).reconcile_employee_counts(dry_run=dry_run)
+        for cafe_id, stored, actual in drift:
+            logger.warning("Cafe %s employee_count %d, actual %d", cafe_id, stored, actual,
+                           extra={"cafe_id": str(cafe_id), "stored": stored, "actual": actual})
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        logger.info("%d cafe(s) %s", len(drift), "drifted" if dry_run else "repaired")
+        return len(drift)
+    finally:
+        db.close()
@@ -1,22 +1,54 @@
-from typing import List, Optional, Tuple
-from sqlalchemy import select, func
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import Row, select, delete, update, or_, and_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from app.domain.models import Cafe, EmployeeCafe
+from app.domain.models import Cafe, Employee, EmployeeCafe
+from app.repositories.pagination import like_prefix
+
+EXPORT_COLUMNS = ("id", "name", "description", "logo_url", "location")
 
 class CafesRepo:
     def __init__(self, db: Session):
         self.db = db
 
-    def list_with_counts(self, location: Optional[str]) -> List[Tuple[Cafe, int]]:
+    def list_with_counts(
+        self,
+        location: Optional[str],
+        name_prefix: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[int, str]] = None,
+    ) -> List[Row]:
+        return list(self.db.execute(self._list_with_counts_stmt(location, name_prefix, limit, after)).all())
+
+    def iter_with_counts(self, location: Optional[str], name_prefix: Optional[str] = None,
+                         limit: Optional[int] = None, after: Optional[Tuple[int, str]] = None,
+                         batch_size: int = 1000):
+        """list_with_counts through a server-side cursor, `batch_size` rows per fetch."""
+        stmt = self._list_with_counts_stmt(location, name_prefix, limit, after)
+        return self.db.execute(stmt.execution_options(yield_per=batch_size))
+
+    def _list_with_counts_stmt(self, location, name_prefix, limit, after):
+        # Sort key is (employee count desc, id asc); `after` is the key of the last row already returned.
+        # Both orders are served by an index scan over ix_cafes_[location_]employee_count_id.
+        # Plain column rows: no ORM identity map or instance state for a read-only listing
         stmt = (
-            select(Cafe, func.count(EmployeeCafe.employee_id).label("emp_count"))
-            .join(EmployeeCafe, EmployeeCafe.cafe_id == Cafe.id, isouter=True)
-            .group_by(Cafe.id)
-            .order_by(func.count(EmployeeCafe.employee_id).desc())
+            select(Cafe.id, Cafe.name, Cafe.description, Cafe.logo_url, Cafe.location, Cafe.employee_count)
+            .order_by(Cafe.employee_count.desc(), Cafe.id)
         )
         if location:
             stmt = stmt.where(Cafe.location == location)
-        return list(self.db.execute(stmt).all())
+        if name_prefix:
+            stmt = stmt.where(Cafe.name.ilike(like_prefix(name_prefix), escape="\\"))
+        if after:
+            last_count, last_id = after
+            stmt = stmt.where(
+                # Redundant bound that the index scan can start from; the OR alone is only a filter
+                Cafe.employee_count <= last_count,
+                or_(Cafe.employee_count < last_count, and_(Cafe.employee_count == last_count, Cafe.id > last_id)),
+            )
+        if limit:
+            stmt = stmt.limit(limit)
+        return stmt
 
     def get(self, cafe_id):
         return self.db.get(Cafe, cafe_id)
@@ -25,11 +57,116 @@ class CafesRepo:
         self.db.add(cafe)
         return cafe
 
-    def update_fields(self, cafe: Cafe, data: dict) -> Cafe:
-        for k, v in data.items():
-            if v is not None and hasattr(cafe, k):
-                setattr(cafe, k, v)
-        return cafe
+    def update_by_id(self, cafe_id, changes: dict) -> bool:
+        """Write the non-None `changes` with one UPDATE (no load); False if there is no such cafe."""
+        values = {k: v for k, v in changes.items() if v is not None}
+        if not values:
+            return self.db.execute(self._exists_stmt(cafe_id)).first() is not None
+        return self.db.execute(self._update_stmt(cafe_id, values)).rowcount > 0
+
+    def _exists_stmt(self, cafe_id):
+        return select(Cafe.id).where(Cafe.id == cafe_id)
+
+    def _update_stmt(self, cafe_id, values: dict):
+        return update(Cafe).where(Cafe.id == cafe_id).values(**values).execution_options(synchronize_session=False)
 
     def delete(self, cafe: Cafe):
         self.db.delete(cafe)
+
+    def delete_many(self, cafe_ids: List[Any]) -> Tuple[int, int]:
+        """Delete cafes and every employee assigned to them; returns (cafes, employees) deleted."""
+        self.db.execute(self._lock_stmt(cafe_ids))
+        employees = self.db.execute(self._delete_staff_stmt(cafe_ids)).rowcount
+        cafes = self.db.execute(self._delete_cafes_stmt(cafe_ids)).rowcount
+        return cafes, employees
+
+    def _lock_stmt(self, cafe_ids):
+        # Row locks on the cafes block concurrent assignments (their FK check needs a
+        # KEY SHARE lock) so no employee can slip in between the two DELETEs
+        return select(Cafe.id).where(Cafe.id.in_(cafe_ids)).with_for_update()
+
+    def _delete_staff_stmt(self, cafe_ids):
+        # employee_cafe rows go with them through ON DELETE CASCADE
+        staff = select(EmployeeCafe.employee_id).where(EmployeeCafe.cafe_id.in_(cafe_ids))
+        return (
+            delete(Employee)
+            .where(Employee.id.in_(staff))
+            .execution_options(synchronize_session=False)
+        )
+
+    def _delete_cafes_stmt(self, cafe_ids):
+        return delete(Cafe).where(Cafe.id.in_(cafe_ids)).execution_options(synchronize_session=False)
+
+    def existing_ids(self, ids: List[Any]) -> set:
+        return set(self.db.execute(select(Cafe.id).where(Cafe.id.in_(ids))).scalars())
+
+    def insert_many(self, rows: List[dict]) -> List[Any]:
+        return list(self.db.execute(pg_insert(Cafe).values(rows).returning(Cafe.id)).scalars())
+
+    def reconcile_employee_counts(self, dry_run: bool = False) -> List[Tuple[Any, int, int]]:
+        """Recompute every cafe's employee_count; returns (cafe id, stored, actual) for each
+        cafe that had drifted, after fixing them unless `dry_run`."""
+        # SHARE blocks assignment changes (not reads) until commit, so the recount can't
+        # race a trigger update
+        self.db.execute(text("LOCK TABLE employee_cafe IN SHARE MODE"))
+        drift = self.db.execute(text(
+            "SELECT c.id, c.employee_count, count(ec.employee_id) AS actual "
+            "FROM cafes c LEFT JOIN employee_cafe ec ON ec.cafe_id = c.id "
+            "GROUP BY c.id HAVING c.employee_count <> count(ec.employee_id) "
+            "ORDER BY c.id"
+        )).all()
+        if drift and not dry_run:
+            self.db.execute(
+                text("UPDATE cafes SET employee_count = :actual WHERE id = :id"),
+                [{"id": cafe_id, "actual": actual} for cafe_id, _, actual in drift],
+            )
+        return [tuple(row) for row in drift]
+
+    def recount_employees(self):
+        """Set every cafe's employee_count from employee_cafe in one statement, e.g. after
+        a bulk load with the count triggers disabled."""
+        self.db.execute(text(
+            "UPDATE cafes c SET employee_count = coalesce(n.count, 0) "
+            "FROM cafes c2 LEFT JOIN (SELECT cafe_id, count(*) FROM employee_cafe GROUP BY cafe_id) n "
+            "ON n.cafe_id = c2.id WHERE c.id = c2.id AND c.employee_count <> coalesce(n.count, 0)"
+        ))
+
+    def iter_export(self, batch_size: int = 1000):
+        """Stream every cafe through a server-side cursor, `batch_size` rows per fetch."""
+        stmt = (
+            select(Cafe.id, Cafe.name, Cafe.description, Cafe.logo_url, Cafe.location)
+            .order_by(Cafe.id)
+            .execution_options(yield_per=batch_size)
+        )
+        return self.db.execute(stmt)
+
+class AsyncCafesRepo(CafesRepo):
+    """Same queries as CafesRepo, executed on an AsyncSession."""
+
+    async def list_with_counts(
+        self,
+        location: Optional[str],
+        name_prefix: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[int, str]] = None,
+    ) -> List[Row]:
+        result = await self.db.execute(self._list_with_counts_stmt(location, name_prefix, limit, after))
+        return list(result.all())
+
+    async def get(self, cafe_id):
+        return await self.db.get(Cafe, cafe_id)
+
+    async def update_by_id(self, cafe_id, changes: dict) -> bool:
+        values = {k: v for k, v in changes.items() if v is not None}
+        if not values:
+            return (await self.db.execute(self._exists_stmt(cafe_id))).first() is not None
+        return (await self.db.execute(self._update_stmt(cafe_id, values))).rowcount > 0
+
+    async def delete(self, cafe: Cafe):
+        await self.db.delete(cafe)
+
+    async def delete_many(self, cafe_ids: List[Any]) -> Tuple[int, int]:
+        await self.db.execute(self._lock_stmt(cafe_ids))
+        employees = (await self.db.execute(self._delete_staff_stmt(cafe_ids))).rowcount
+        cafes = (await self.db.execute(self._delete_cafes_stmt(cafe_ids))).rowcount
+        return cafes, employees
@@ -1,55 +1,306 @@
+from datetime import date
 from typing import List, Optional, Tuple
-from sqlalchemy import select, func, literal_column, Integer
+from sqlalchemy import Date, Row, Uuid, String, cast, column, select, delete, update, values, func, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from app.domain.models import Employee, Cafe, EmployeeCafe
+from app.domain.models import Employee, Cafe, EmployeeCafe, EMPLOYEE_ID_CAPACITY
+from app.repositories.pagination import like_prefix
+
+EXPORT_COLUMNS = ("id", "name", "email_address", "phone_number", "gender", "cafe_id", "start_date")
+# Sort key of unassigned employees (no start_date): after every real date, as in ix_employees_tenure
+UNASSIGNED = text("'infinity'::date")
 
 class EmployeesRepo:
     def __init__(self, db: Session):
         self.db = db
 
-    def list_with_days_and_cafe(self, cafe_id: Optional[str]) -> List[Tuple[Employee, int, Optional[str]]]:
-        days_expr = func.cast(func.coalesce(func.extract("day", func.age(func.current_date(), EmployeeCafe.start_date)),0),Integer)
+    def list_with_days_and_cafe(
+        self,
+        cafe_id: Optional[str],
+        name_prefix: Optional[str] = None,
+        gender: Optional[str] = None,
+        location: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Optional[date], str]] = None,
+    ) -> List[Row]:
+        stmt = self._list_with_days_and_cafe_stmt(cafe_id, name_prefix, gender, location, limit, after)
+        return list(self.db.execute(stmt).all())
+
+    def iter_with_days_and_cafe(self, cafe_id: Optional[str], name_prefix: Optional[str] = None,
+                                gender: Optional[str] = None, location: Optional[str] = None,
+                                limit: Optional[int] = None, after: Optional[Tuple[Optional[date], str]] = None,
+                                batch_size: int = 1000):
+        """list_with_days_and_cafe through a server-side cursor, `batch_size` rows per fetch."""
+        stmt = self._list_with_days_and_cafe_stmt(cafe_id, name_prefix, gender, location, limit, after)
+        return self.db.execute(stmt.execution_options(yield_per=batch_size))
+
+    def _list_with_days_and_cafe_stmt(self, cafe_id, name_prefix, gender, location, limit, after):
+        # Longest tenure first == earliest start_date first, unassigned employees last.
+        # Under ?cafe= ix_employee_cafe_cafe_id_start_date serves the order; otherwise
+        # ix_employees_tenure does, on the trigger-maintained copy in employees.start_date.
+        # `after` is the (start_date, id) key of the last row already returned.
+        days_expr = func.coalesce(func.current_date() - EmployeeCafe.start_date, 0)
         stmt = (
             select(
-                Employee,
+                Employee.id,
+                Employee.name,
+                Employee.email_address,
+                Employee.phone_number,
+                Employee.gender,
                 days_expr.label("days_worked"),
                 Cafe.name.label("cafe_name"),
+                EmployeeCafe.start_date,
             )
             .join(EmployeeCafe, EmployeeCafe.employee_id == Employee.id, isouter=True)
             .join(Cafe, Cafe.id == EmployeeCafe.cafe_id, isouter=True)
-            .order_by(days_expr.desc())
-)
+        )
         if cafe_id:
-            stmt = stmt.where(Cafe.id == cafe_id)
-        return list(self.db.execute(stmt).all())
+            # Only assigned employees, so start_date is never NULL here
+            stmt = stmt.where(EmployeeCafe.cafe_id == cafe_id).order_by(EmployeeCafe.start_date, Employee.id)
+            if after:
+                stmt = stmt.where(tuple_(EmployeeCafe.start_date, Employee.id) > tuple_(*after))
+        else:
+            tenure = func.coalesce(Employee.start_date, UNASSIGNED)
+            stmt = stmt.order_by(tenure, Employee.id)
+            if after:
+                last_start, last_id = after
+                stmt = stmt.where(tuple_(tenure, Employee.id) > tuple_(func.coalesce(last_start, UNASSIGNED), last_id))
+        if location:
+            stmt = stmt.where(Cafe.location == location)
+        if name_prefix:
+            # ilike can't use an index; lower() matches the same rows through ix_employees_name_prefix
+            stmt = stmt.where(func.lower(Employee.name).like(like_prefix(name_prefix.lower()), escape="\\"))
+        if gender:
+            stmt = stmt.where(Employee.gender == gender)
+        if limit:
+            stmt = stmt.limit(limit)
+        return stmt
 
     def get(self, emp_id: str):
         return self.db.get(Employee, emp_id)
 
     def create(self, employee: Employee) -> Employee:
+        # Flush so the INSERT ... RETURNING fills in the sequence-generated id
         self.db.add(employee)
+        self.db.flush()
         return employee
 
+    def update_by_id(self, emp_id: str, changes: dict) -> bool:
+        """Write the non-None `changes` with one UPDATE (no load); False if there is no such employee."""
+        values = {k: v for k, v in changes.items() if v is not None}
+        if not values:
+            return self.db.execute(self._exists_stmt(emp_id)).first() is not None
+        return self.db.execute(self._update_stmt(emp_id, values)).rowcount > 0
+
+    def _exists_stmt(self, emp_id: str):
+        return select(Employee.id).where(Employee.id == emp_id)
+
+    def _update_stmt(self, emp_id: str, values: dict):
+        return (
+            update(Employee)
+            .where(Employee.id == emp_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
     def upsert_mapping(self, emp_id: str, cafe_id: Optional[str], start_date):
-        # remove mapping if cafe_id is None
-        current = self.db.get(EmployeeCafe, emp_id)
+        """Assign the employee to `cafe_id` in one statement; None removes the assignment.
+
+        A None start_date keeps the current one (today for a new assignment).
+        """
+        self.db.execute(self._upsert_mapping_stmt(emp_id, cafe_id, start_date))
+
+    def _upsert_mapping_stmt(self, emp_id: str, cafe_id: Optional[str], start_date):
         if cafe_id is None:
-            if current:
-                self.db.delete(current)
-            return None
-        if current:
-            current.cafe_id = cafe_id
-            if start_date:
-                current.start_date = start_date
-            return current
-        mapping = EmployeeCafe(employee_id=emp_id, cafe_id=cafe_id, start_date=start_date)
-        self.db.add(mapping)
-        return mapping
+            return self._delete_mapping_stmt(emp_id)
+        stmt = pg_insert(EmployeeCafe).values(employee_id=emp_id, cafe_id=cafe_id, start_date=start_date or date.today())
+        changes = {"cafe_id": stmt.excluded.cafe_id}
+        if start_date:
+            changes["start_date"] = stmt.excluded.start_date
+        return stmt.on_conflict_do_update(index_elements=[EmployeeCafe.employee_id], set_=changes)
+
+    def insert_many(self, rows: List[dict]) -> List[Tuple[str, str]]:
+        """Multi-row INSERT with sequence-generated ids; returns (id, email) of inserted rows.
+
+        Rows whose email already exists are skipped rather than raised.
+        """
+        stmt = (
+            pg_insert(Employee)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[Employee.email_address])
+            .returning(Employee.id, Employee.email_address)
+        )
+        return [tuple(r) for r in self.db.execute(stmt).all()]
+
+    def id_space(self) -> dict:
+        last_value, is_called = self.db.execute(text("SELECT last_value, is_called FROM employee_id_seq")).one()
+        allocated = last_value if is_called else last_value - 1
+        return {
+            "allocated": allocated,
+            "capacity": EMPLOYEE_ID_CAPACITY,
+            "remaining": EMPLOYEE_ID_CAPACITY - allocated,
+            "used_ratio": round(allocated / EMPLOYEE_ID_CAPACITY, 6),
+            "employees": self.db.scalar(select(func.count()).select_from(Employee)),
+        }
+
+    def sync_id_sequence(self):
+        """Move the id sequence past every existing UIxxxxxxx id, e.g. after rows were
+        inserted with explicit ids."""
+        self.db.execute(text(
+            "SELECT setval('employee_id_seq', GREATEST("
+            "(SELECT max(substr(id, 3)::int) FROM employees WHERE id ~ '^UI[0-9]{7}$'), "
+            "(SELECT last_value FROM employee_id_seq WHERE is_called), 1), "
+            "EXISTS (SELECT 1 FROM employees) OR (SELECT is_called FROM employee_id_seq))"
+        ))
+
+    def insert_mappings(self, rows: List[dict]):
+        if rows:
+            self.db.execute(pg_insert(EmployeeCafe).values(rows))
+
+    def lock_existing(self, employee_ids: List[str]) -> set:
+        """The ids that exist, row-locked until commit (in id order, so two batches touching
+        the same employees queue up instead of deadlocking)."""
+        stmt = select(Employee.id).where(Employee.id.in_(employee_ids)).order_by(Employee.id).with_for_update()
+        return set(self.db.execute(stmt).scalars())
+
+    def assigned(self, employee_ids: List[str]) -> set:
+        """The ids among `employee_ids` that have a cafe assignment."""
+        if not employee_ids:
+            return set()
+        stmt = select(EmployeeCafe.employee_id).where(EmployeeCafe.employee_id.in_(employee_ids))
+        return set(self.db.execute(stmt).scalars())
+
+    def update_many(self, rows: List[dict]):
+        """Apply per-employee field changes with one UPDATE ... FROM (VALUES ...).
+
+        Each row has id, name, email_address, phone_number and gender; None keeps the column.
+        """
+        if not rows:
+            return
+        fields = ("name", "email_address", "phone_number", "gender")
+        v = values(column("id", String), *(column(f, String) for f in fields), name="v").data(
+            [(r["id"], *(r.get(f) for f in fields)) for r in rows]
+        )
+        stmt = (
+            update(Employee)
+            .where(Employee.id == v.c.id)
+            .values(
+                name=func.coalesce(v.c.name, Employee.name),
+                email_address=func.coalesce(v.c.email_address, Employee.email_address),
+                phone_number=func.coalesce(v.c.phone_number, Employee.phone_number),
+                gender=func.coalesce(cast(v.c.gender, Employee.gender.type), Employee.gender),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self.db.execute(stmt)
+
+    def set_mappings(self, rows: List[dict]):
+        """Upsert cafe assignments (employee_id, cafe_id, start_date) in two statements.
+
+        Existing assignments change with one UPDATE ... FROM (VALUES ...); a None cafe_id or
+        start_date keeps the current value, like upsert_mapping. Employees without an
+        assignment get one inserted (start_date defaults to today).
+        """
+        if not rows:
+            return
+        v = values(
+            column("employee_id", String), column("cafe_id", Uuid), column("start_date", Date), name="v"
+        ).data([(r["employee_id"], r["cafe_id"], r["start_date"]) for r in rows])
+        stmt = (
+            update(EmployeeCafe)
+            .where(EmployeeCafe.employee_id == v.c.employee_id)
+            .values(
+                cafe_id=func.coalesce(cast(v.c.cafe_id, EmployeeCafe.cafe_id.type), EmployeeCafe.cafe_id),
+                start_date=func.coalesce(cast(v.c.start_date, Date), EmployeeCafe.start_date),
+            )
+            .returning(EmployeeCafe.employee_id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = set(self.db.execute(stmt).scalars())
+        self.insert_mappings([
+            {"employee_id": r["employee_id"], "cafe_id": r["cafe_id"], "start_date": r["start_date"] or date.today()}
+            for r in rows
+            if r["employee_id"] not in updated and r["cafe_id"] is not None
+        ])
+
+    def delete_mappings(self, employee_ids: List[str]):
+        if employee_ids:
+            self.db.execute(
+                delete(EmployeeCafe)
+                .where(EmployeeCafe.employee_id.in_(employee_ids))
+                .execution_options(synchronize_session=False)
+            )
+
+    def iter_export(self, batch_size: int = 1000):
+        """Stream every employee through a server-side cursor, `batch_size` rows per fetch."""
+        stmt = (
+            select(
+                Employee.id, Employee.name, Employee.email_address, Employee.phone_number,
+                Employee.gender, EmployeeCafe.cafe_id, EmployeeCafe.start_date,
+            )
+            .join(EmployeeCafe, EmployeeCafe.employee_id == Employee.id, isouter=True)
+            .order_by(Employee.id)
+            .execution_options(yield_per=batch_size)
+        )
+        return self.db.execute(stmt)
 
     def delete(self, employee: Employee):
         self.db.delete(employee)
 
+    def delete_many(self, employee_ids: List[str]) -> int:
+        return self.db.execute(self._delete_many_stmt(employee_ids)).rowcount
+
+    def _delete_many_stmt(self, employee_ids: List[str]):
+        # employee_cafe rows go with them through ON DELETE CASCADE
+        return (
+            delete(Employee)
+            .where(Employee.id.in_(employee_ids))
+            .execution_options(synchronize_session=False)
+        )
+
     def delete_mapping(self, employee_id: str):
-        self.db.query(EmployeeCafe).filter(
-            EmployeeCafe.employee_id == employee_id
-        ).delete()
\ No newline at end of file
+        self.db.execute(self._delete_mapping_stmt(employee_id))
+
+    def _delete_mapping_stmt(self, employee_id: str):
+        return delete(EmployeeCafe).where(EmployeeCafe.employee_id == employee_id)
+
+class AsyncEmployeesRepo(EmployeesRepo):
+    """Same queries as EmployeesRepo, executed on an AsyncSession."""
+
+    async def list_with_days_and_cafe(
+        self,
+        cafe_id: Optional[str],
+        name_prefix: Optional[str] = None,
+        gender: Optional[str] = None,
+        location: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Optional[date], str]] = None,
+    ) -> List[Row]:
+        stmt = self._list_with_days_and_cafe_stmt(cafe_id, name_prefix, gender, location, limit, after)
+        return list((await self.db.execute(stmt)).all())
+
+    async def get(self, emp_id: str):
+        return await self.db.get(Employee, emp_id)
+
+    async def create(self, employee: Employee) -> Employee:
+        self.db.add(employee)
+        await self.db.flush()
+        return employee
+
+    async def update_by_id(self, emp_id: str, changes: dict) -> bool:
+        values = {k: v for k, v in changes.items() if v is not None}
+        if not values:
+            return (await self.db.execute(self._exists_stmt(emp_id))).first() is not None
+        return (await self.db.execute(self._update_stmt(emp_id, values))).rowcount > 0
+
+    async def upsert_mapping(self, emp_id: str, cafe_id: Optional[str], start_date):
+        await self.db.execute(self._upsert_mapping_stmt(emp_id, cafe_id, start_date))
+
+    async def delete(self, employee: Employee):
+        await self.db.delete(employee)
+
+    async def delete_many(self, employee_ids: List[str]) -> int:
+        return (await self.db.execute(self._delete_many_stmt(employee_ids))).rowcount
+
+    async def delete_mapping(self, employee_id: str):
+        await self.db.execute(self._delete_mapping_stmt(employee_id))
@@ -0,0 +1,27 @@
+import base64
+import json
+from typing import Any, List, Optional
+
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(key: List[Any]) -> str:
+    raw = json.dumps(key, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[List[Any]]:
+    """Turn an opaque cursor back into the sort key of the last row seen."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list):
+        raise ValueError("Invalid cursor")
+    return key
+
+def like_prefix(value: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally as a prefix."""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
@@ -1,21 +1,53 @@
+"""Sample data for a fresh install, and a generator for production-sized data sets.
+
+    python -m app.cli seed                                   the 7 sample cafes
+    python -m app.cli seed --cafes 20000 --employees 2000000 --workers 8 --replace
+"""
+import hashlib
+import logging
+import multiprocessing
 import os
-import sys
+import random
+import time
+from collections import Counter
 from datetime import date, timedelta
-from uuid import uuid4
-
-# Add backend to path so imports work
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from typing import Optional, Tuple
+from uuid import UUID, uuid4
 
 from app.core.config import settings
-from app.db.session import engine, SessionLocal
-from app.domain.models import Base, Cafe, Employee, EmployeeCafe
+from app.db.session import SessionLocal
+from app.domain.models import Cafe, Employee, EmployeeCafe, EMPLOYEE_ID_CAPACITY
+from app.repositories.cafes_repo import CafesRepo
+from app.repositories.employees_repo import EmployeesRepo
+from sqlalchemy import insert, make_url, text
+
+logger = logging.getLogger(__name__)
+
+LOCATIONS = ["Singapore", "Jakarta", "Bangkok", "Kuala Lumpur", "Manila", "Hanoi", "Taipei", "Seoul"]
+FIRST_NAMES = ["Alice", "Bob", "Carol", "David", "Eva", "Frank", "Grace", "Henry", "Isabella", "Jack",
+               "Kevin", "Laura", "Michael", "Nina", "Oscar", "Patricia", "Rachel", "Steven", "Tanya", "Victoria",
+               "Aisha", "Wei", "Siti", "Arjun", "Mei", "Hiroshi", "Nur", "Minh", "Ji-woo", "Rizal"]
+LAST_NAMES = ["Johnson", "Chen", "Martinez", "Lee", "Patel", "Wong", "Kim", "Tan", "Rodriguez", "Anderson",
+              "Brown", "Garcia", "Torres", "Khanna", "Lopez", "Smith", "Adams", "Hartley", "Okonkwo", "Nelson",
+              "Lim", "Ng", "Rahman", "Nguyen", "Santos", "Sato", "Park", "Wijaya", "Reyes", "Ong"]
+CAFE_WORDS = ["Brew", "Bean", "Daily", "Artisan", "Urban", "River", "Kopi", "Roast", "Corner", "Harbour",
+              "Morning", "Velvet", "Copper", "Little", "Golden", "Hidden"]
+CAFE_KINDS = ["Cafe", "Roasters", "Coffee", "Espresso Bar", "Kopitiam", "Bakehouse", "Tea House", "Grind"]
+CAFE_BLURBS = ["Specialty coffee and pastries", "Quiet spot for study and work", "Single-origin pour-overs",
+               "Traditional kopi and kaya toast", "All-day brunch and cold brew", "Neighbourhood espresso bar"]
+EMAIL_DOMAINS = ["example.com", "example.org", "example.net"]
+
+# Generated rows come from one RNG per block of this many rows, so the data depends only on
+# (seed, counts), not on --workers or --batch-size
+GENERATOR_BLOCK = 10_000
+UNASSIGNED_RATIO = 0.1
+COUNT_TRIGGERS = ("employee_cafe_count_ins", "employee_cafe_count_del", "employee_cafe_count_upd")
+# The loader writes employees.start_date itself
+START_DATE_TRIGGERS = ("employee_cafe_start_date_ins", "employee_cafe_start_date_del", "employee_cafe_start_date_upd")
 
 def seed_database():
     """Seed the database with 7 cafes and 20+ employees."""
     
-    # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
-    
     db = SessionLocal()
     
     try:
@@ -28,55 +60,53 @@ def seed_database():
         # 7 Cafes across different locations
         cafes = [
             Cafe(
-                id=str(uuid4()),
+                id=uuid4(),
                 name="Brew & Bean",
                 description="Cozy corner cafe with specialty coffee and pastries",
                 location="Singapore"
             ),
             Cafe(
-                id=str(uuid4()),
+                id=uuid4(),
                 name="The Daily Grind",
                 description="Fast-paced cafe perfect for business meetings and work",
                 location="Singapore"
             ),
             Cafe(
-                id=str(uuid4()),
+                id=uuid4(),
                 name="Artisan Roasters",
                 description="Premium single-origin coffee and freshly baked goods",
                 location="Jakarta"
 
             ),
             Cafe(
-                id=str(uuid4()),
+                id=uuid4(),
                 name="Cafe Serenity",
                 description="Quiet study-friendly environment with WiFi",
                 location="Bangkok"
             ),
             Cafe(
-                id=str(uuid4()),
+                id=uuid4(),
                 name="Urban Espresso",
                 description="Modern minimalist cafe in the business district",
                 location="Singapore"
             ),
             Cafe(
-                id=str(uuid4()),
+                id=uuid4(),
                 name="Kedai Kopi Tradisional",
                 description="Traditional Indonesian coffee shop with local charm",
                 location="Jakarta"
             ),
             Cafe(
-                id=str(uuid4()),
+                id=uuid4(),
                 name="River Cafe",
                 description="Riverside cafe with scenic views and relaxing ambiance",
                 location="Bangkok"
             ),
         ]
         
-        for cafe in cafes:
-            db.add(cafe)
-        db.commit()
-        
-        print(f"✓ Seeded {len(cafes)} cafes")
+        db.add_all(cafes)
+        db.flush()
+        logger.info("Seeded %d cafes", len(cafes))
         
         # 20+ Employees with varied start dates and distribution across cafes
         employees_data = [
@@ -118,43 +148,153 @@ def seed_database():
             ("UI1000023", "Victoria Nelson", "victoria.n@example.com", "83456789", "Female", cafes[6].id, date.today() - timedelta(days=55)),
         ]
         
-        for emp_id, name, email, phone, gender, cafe_id, start_date in employees_data:
-            employee = Employee(
-                id=emp_id,
-                name=name,
-                email_address=email,
-                phone_number=phone,
-                gender=gender
-            )
-            db.add(employee)
-            db.flush()  # Ensure employee is inserted before creating mapping
-            
-            # Create employee-cafe mapping
-            mapping = EmployeeCafe(
-                employee_id=emp_id,
-                cafe_id=cafe_id,
-                start_date=start_date
-            )
-            db.add(mapping)
+        # Two multi-row INSERTs instead of a flush per employee
+        db.execute(insert(Employee), [
+            {"id": emp_id, "name": name, "email_address": email, "phone_number": phone, "gender": gender}
+            for emp_id, name, email, phone, gender, _, _ in employees_data
+        ])
+        db.execute(insert(EmployeeCafe), [
+            {"employee_id": emp_id, "cafe_id": cafe_id, "start_date": start_date}
+            for emp_id, _, _, _, _, cafe_id, start_date in employees_data
+        ])
         
+        # Explicit ids above: keep the id sequence from handing them out again
+        EmployeesRepo(db).sync_id_sequence()
         db.commit()
-        print(f"✓ Seeded {len(employees_data)} employees with cafe assignments")
-        print("✓ Database seeded successfully!")
+        logger.info("Seeded %d employees with cafe assignments", len(employees_data))
         
-        # Print summary
-        print("\n--- Seed Data Summary ---")
-        print(f"Cafes seeded: {len(cafes)}")
-        print(f"Employees seeded: {len(employees_data)}")
-        for i, cafe in enumerate(cafes, 1):
-            emp_count = sum(1 for _, _, _, _, _, cafe_id, _ in employees_data if cafe_id == cafe.id)
-            print(f"  {cafe.name} ({cafe.location}): {emp_count} employees")
+        # Summary
+        per_cafe = Counter(cafe_id for *_, cafe_id, _ in employees_data)
+        for cafe in cafes:
+            logger.info("%s (%s): %d employees", cafe.name, cafe.location, per_cafe[cafe.id])
         
     except Exception as e:
         db.rollback()
-        print(f"✗ Error seeding database: {e}")
+        logger.error("Error seeding database: %s", e)
         raise
     finally:
         db.close()
 
-if __name__ == "__main__":
-    seed_database()
+def cafe_uuid(seed: int, index: int) -> UUID:
+    """Id of generated cafe `index`; a pure function, so employee blocks need no cafe list."""
+    return UUID(bytes=hashlib.blake2b(f"{seed}:{index}".encode(), digest_size=16).digest(), version=4)
+
+def _cafe_rows(seed: int, start: int, stop: int) -> str:
+    # COPY text format; generated values never contain tabs, newlines or backslashes
+    lines = []
+    for block in range(start // GENERATOR_BLOCK, -(-stop // GENERATOR_BLOCK)):
+        rng = random.Random(f"{seed}:cafes:{block}")
+        for i in range(block * GENERATOR_BLOCK, min((block + 1) * GENERATOR_BLOCK, stop)):
+            name = f"{rng.choice(CAFE_WORDS)} {rng.choice(CAFE_KINDS)}"
+            lines.append(f"{cafe_uuid(seed, i)}\t{name}\t{rng.choice(CAFE_BLURBS)}\t{rng.choice(LOCATIONS)}\n")
+    return "".join(lines)
+
+def _employee_rows(seed: int, n_cafes: int, start: int, stop: int, today: date) -> Tuple[str, str]:
+    employees, mappings = [], []
+    for block in range(start // GENERATOR_BLOCK, -(-stop // GENERATOR_BLOCK)):
+        rng = random.Random(f"{seed}:employees:{block}")
+        for i in range(block * GENERATOR_BLOCK, min((block + 1) * GENERATOR_BLOCK, stop)):
+            emp_id = f"UI{i + 1:07d}"
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            email = f"{first}.{last}.{i + 1}@{rng.choice(EMAIL_DOMAINS)}".lower()
+            phone = f"{rng.choice('89')}{rng.randrange(10**7):07d}"
+            gender = rng.choice(("Male", "Female"))
+            start_date = "\\N"  # COPY's NULL: unassigned
+            if n_cafes and rng.random() >= UNASSIGNED_RATIO:
+                start_date = (today - timedelta(days=rng.randrange(3650))).isoformat()
+                mappings.append(f"{emp_id}\t{cafe_uuid(seed, rng.randrange(n_cafes))}\t{start_date}\n")
+            employees.append(f"{emp_id}\t{first} {last}\t{email}\t{phone}\t{gender}\t{start_date}\n")
+    return "".join(employees), "".join(mappings)
+
+def _libpq_url() -> str:
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
+def _load_block(task) -> Tuple[str, int]:
+    """Worker process: generate one batch and COPY it in, in its own transaction."""
+    import psycopg
+
+    kind, seed, start, stop, n_cafes, today = task
+    with psycopg.connect(_libpq_url()) as conn, conn.cursor() as cur:
+        if kind == "cafes":
+            with cur.copy("COPY cafes (id, name, description, location) FROM STDIN") as copy:
+                copy.write(_cafe_rows(seed, start, stop))
+        else:
+            employees, mappings = _employee_rows(seed, n_cafes, start, stop, today)
+            with cur.copy("COPY employees (id, name, email_address, phone_number, gender, start_date) FROM STDIN") as copy:
+                copy.write(employees)
+            with cur.copy("COPY employee_cafe (employee_id, cafe_id, start_date) FROM STDIN") as copy:
+                copy.write(mappings)
+    return kind, stop - start
+
+def _run_tasks(pool, kind: str, tasks: list, total: int):
+    started = time.perf_counter()
+    done, last_report = 0, 0.0
+    for _, rows in (pool.imap_unordered(_load_block, tasks) if pool else map(_load_block, tasks)):
+        done += rows
+        elapsed = time.perf_counter() - started
+        if elapsed - last_report >= 2 or done == total:
+            last_report = elapsed
+            logger.info("%s: %d/%d (%.0f%%), %.0f rows/s", kind, done, total, 100 * done / total, done / elapsed)
+
+def seed_scaled(
+    n_cafes: int,
+    n_employees: int,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    batch_size: int = 50_000,
+):
+    """Replace all data with `n_cafes` cafes and `n_employees` employees.
+
+    The data set is a pure function of (n_cafes, n_employees, seed), so two runs (e.g.
+    benchmarks on different commits) query identical rows. About 1 in 10 employees is
+    left unassigned to exercise the outer joins. Batches of `batch_size` rows are
+    generated and COPYed by `workers` processes (default: one per CPU, at most 8); the
+    employee_count triggers are off during the load and the counts are computed once at the end;
+    employees.start_date is written by the loader instead of its triggers.
+    """
+    if n_employees > EMPLOYEE_ID_CAPACITY:
+        raise ValueError(f"At most {EMPLOYEE_ID_CAPACITY} employees fit the UIXXXXXXX id space")
+    workers = workers or min(os.cpu_count() or 1, 8)
+    # Whole generator blocks per batch, so each block is produced by exactly one worker
+    batch_size = max(GENERATOR_BLOCK, batch_size // GENERATOR_BLOCK * GENERATOR_BLOCK)
+    today = date.today()
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        db.execute(text("TRUNCATE employee_cafe, employees, cafes"))
+        # Per-statement count updates from parallel COPYs would contend on the same cafe rows
+        for trigger in COUNT_TRIGGERS + START_DATE_TRIGGERS:
+            db.execute(text(f"ALTER TABLE employee_cafe DISABLE TRIGGER {trigger}"))
+        db.commit()
+        try:
+            cafe_tasks = [("cafes", seed, i, min(i + batch_size, n_cafes), n_cafes, today)
+                          for i in range(0, n_cafes, batch_size)]
+            employee_tasks = [("employees", seed, i, min(i + batch_size, n_employees), n_cafes, today)
+                              for i in range(0, n_employees, batch_size)]
+            # spawn: the parent has a logging thread and an open pool, neither of which forks safely
+            pool = multiprocessing.get_context("spawn").Pool(workers) if workers > 1 else None
+            try:
+                # Cafes must be committed before the employee batches reference them
+                _run_tasks(pool, "cafes", cafe_tasks, n_cafes)
+                _run_tasks(pool, "employees", employee_tasks, n_employees)
+            finally:
+                if pool:
+                    pool.close()
+                    pool.join()
+        finally:
+            for trigger in COUNT_TRIGGERS + START_DATE_TRIGGERS:
+                db.execute(text(f"ALTER TABLE employee_cafe ENABLE TRIGGER {trigger}"))
+            db.commit()
+        CafesRepo(db).recount_employees()
+        EmployeesRepo(db).sync_id_sequence()
+        # Fresh planner statistics, as production would have
+        db.execute(text("ANALYZE cafes, employees, employee_cafe"))
+        db.commit()
+        logger.info("Seeded %d cafes and %d employees (seed=%d, %d workers) in %.1fs",
+                    n_cafes, n_employees, seed, workers, time.perf_counter() - started)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
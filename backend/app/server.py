@@ -0,0 +1,69 @@
+"""Production process model: how many web workers to run and what each resets after fork.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+"""
+import logging
+import math
+import os
+from typing import Optional
+from app.core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+
+def available_cpus() -> int:
+    """CPUs this process may run on: its affinity mask, capped by a cgroup v2 CPU quota
+    (e.g. a container limited to 2 CPUs on a 16-core host)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open(CGROUP_CPU_MAX) as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def connections_per_worker(settings: Settings) -> int:
+    """Most primary connections one worker can hold: each engine's pool plus overflow."""
+    per_engine = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    # The sync engine always exists (bulk routes use it); DB_ASYNC adds a second pool
+    return per_engine * (2 if settings.DB_ASYNC else 1)
+
+def worker_count(settings: Settings, cpus: Optional[int] = None) -> int:
+    """WEB_WORKERS if set, else one worker per CPU; either way no more than the
+    DB_MAX_CONNECTIONS budget allows, so a full fleet can't exhaust max_connections."""
+    wanted = settings.WEB_WORKERS or (cpus or available_cpus())
+    if settings.DB_EXTERNAL_POOLER or not settings.DB_MAX_CONNECTIONS:
+        # NullPool behind PgBouncer: the pooler bounds server connections
+        return wanted
+    budget = max(1, settings.DB_MAX_CONNECTIONS // connections_per_worker(settings))
+    if wanted > budget:
+        logger.warning(
+            "Running %d workers instead of %d: each may open %d connections and DB_MAX_CONNECTIONS is %d",
+            budget, wanted, connections_per_worker(settings), settings.DB_MAX_CONNECTIONS,
+        )
+    return min(wanted, budget)
+
+def check_cache_backend(settings: Settings, workers: int):
+    """The memory cache is per process: with several workers a write only invalidates the
+    cache of the worker that handled it, and the others serve the old listing (and ETag)
+    for up to CACHE_TTL. Unless CACHE_BACKEND=memory was asked for explicitly, cache nothing."""
+    if workers > 1 and settings.CACHE_BACKEND == "memory" and "CACHE_BACKEND" not in settings.model_fields_set:
+        logger.warning(
+            "CACHE_BACKEND=memory isn't shared between %d workers; caching disabled. "
+            "Set CACHE_BACKEND=redis (or memory explicitly, accepting stale lists)", workers,
+        )
+        settings.CACHE_BACKEND = "none"
+
+def after_fork(settings: Settings):
+    """Run in each worker right after fork when the app was preloaded in the master."""
+    from app.core.log import restart_after_fork
+    from app.db.session import dispose_after_fork
+
+    restart_after_fork(settings)
+    dispose_after_fork()
@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from datetime import date
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from pydantic import ValidationError
+from sqlalchemy.exc import DBAPIError
+from app.core.serialization import dumps
+
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "json": "application/json"}
+
+# (1-based data row number, parsed record or None, parse error or None)
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+def detect_format(explicit: Optional[str], filename: Optional[str], content_type: Optional[str]) -> str:
+    if explicit:
+        fmt = explicit.lower()
+    elif filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        fmt = "ndjson"
+    elif content_type and ("ndjson" in content_type or "jsonl" in content_type):
+        fmt = "ndjson"
+    else:
+        fmt = "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of: {', '.join(FORMATS)}")
+    return fmt
+
+def iter_records(raw: BinaryIO, fmt: str) -> Iterator[Record]:
+    """Parse an upload line by line; the file is never read into memory as a whole."""
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row_no, row in enumerate(reader, start=1):
+            if None in row:
+                yield row_no, None, "Row has more fields than the header"
+                continue
+            # Empty cells mean "not provided", matching an omitted JSON key
+            yield row_no, {k.strip(): (v if v != "" else None) for k, v in row.items()}, None
+        return
+    row_no = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_no, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield row_no, None, "Each line must be a JSON object"
+            continue
+        yield row_no, record, None
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+def validation_messages(e: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" if err["loc"] else err["msg"]
+        for err in e.errors()
+    ]
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def encode_rows(rows: Iterable[Sequence[Any]], columns: Sequence[str], fmt: str, chunk_rows: int = 500) -> Iterator[bytes]:
+    """Encode DB rows as CSV or NDJSON, yielding a chunk every `chunk_rows` rows."""
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(columns)
+        for batch in batched(rows, chunk_rows):
+            writer.writerows([[_plain(v) for v in row] for row in batch])
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode()
+        return
+    for batch in batched(rows, chunk_rows):
+        yield "".join(
+            json.dumps({c: _plain(v) for c, v in zip(columns, row)}) + "\n" for row in batch
+        ).encode()
+
+def encode_items(items: Iterable[Dict[str, Any]], fmt: str, chunk_rows: int = 500) -> Iterator[bytes]:
+    """Encode JSON-ready dicts as one JSON array or as NDJSON, a chunk every `chunk_rows` items."""
+    if fmt == "ndjson":
+        for batch in batched(items, chunk_rows):
+            yield b"".join(dumps(item) + b"\n" for item in batch)
+        return
+    opening = b"["
+    for batch in batched(items, chunk_rows):
+        yield opening + b",".join(dumps(item) for item in batch)
+        opening = b","
+    yield b"[]" if opening == b"[" else b"]"
+
+def db_error_message(e: DBAPIError) -> str:
+    diag = getattr(e.orig, "diag", None)
+    return getattr(diag, "message_primary", None) or str(e.orig)
+
+def insert_with_fallback(db, insert_many, rows: List[dict]) -> Tuple[set, Dict[int, str]]:
+    """Insert `rows` in one statement; if that fails, retry row by row under savepoints
+    so the error is reported against the offending rows only.
+
+    Returns the keys `insert_many` reported as inserted and {row index: error}.
+    """
+    try:
+        with db.begin_nested():
+            return set(insert_many(rows)), {}
+    except DBAPIError:
+        pass
+    inserted, failures = set(), {}
+    for i, row in enumerate(rows):
+        try:
+            with db.begin_nested():
+                inserted.update(insert_many([row]))
+        except DBAPIError as e:
+            failures[i] = db_error_message(e)
+    return inserted, failures
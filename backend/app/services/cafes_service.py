@@ -1,59 +1,256 @@
+import logging
 import uuid
-from typing import Optional, List, Dict, Any
-from app.domain.models import Cafe, Employee
-from app.services.unit_of_work import UnitOfWork
+from contextlib import ExitStack
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+from pydantic import ValidationError
+from app.core.metrics import timed_methods
+from app.db.routing import primary_pinned
+from app.domain.models import Cafe
+from app.domain.schemas import CafeCreate
+from app.repositories.cafes_repo import EXPORT_COLUMNS
+from app.repositories.pagination import encode_cursor, decode_cursor
+from app.services.bulk_io import encode_items, Record, batched, encode_rows, insert_with_fallback, validation_messages
+from app.services.listing_cache import ListingCache, CAFES, EMPLOYEES
 
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+
+@timed_methods
 class CafesService:
-    def __init__(self, uow_factory):
+    def __init__(self, uow_factory, cache: Optional[ListingCache] = None):
         self._uow_factory = uow_factory
+        self._cache = cache or ListingCache()
 
-    def list(self, location: Optional[str]):
-        with self._uow_factory() as uow:
-            rows = uow.cafes.list_with_counts(location)
-            return [
-                {
-                    "id": str(c.id),
-                    "name": c.name,
-                    "description": c.description,
-                    "logo_url": c.logo_url,
-                    "location": c.location,
-                    "employees": int(count),
-                }
-                for c, count in rows
-            ]
+    def list(
+        self,
+        location: Optional[str],
+        name: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return self._cache.get_or_load(
+            CAFES, (location, name, limit, cursor), lambda: self._load(location, name, limit, cursor),
+            refresh=primary_pinned.get(),
+        )
+
+    def stream(
+        self,
+        fmt: str,
+        location: Optional[str],
+        name: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Iterator[bytes]:
+        """The same rows as list() as a JSON array or NDJSON, encoded in batches straight
+        from a server-side cursor; memory use doesn't grow with the result. Bypasses the cache."""
+        # Outside the generator so a bad cursor fails before the response starts
+        after = self._parse_cursor(cursor)
+        return self._stream(fmt, location, name, limit, after)
+
+    def _stream(self, fmt, location, name, limit, after):
+        with ExitStack() as stack:
+            # Pick the session within the first step, as EmployeesService._stream does
+            with self._cache.consistent_reads(CAFES):
+                uow = stack.enter_context(self._uow_factory(read_only=True))
+            rows = uow.cafes.iter_with_counts(location, name, limit, after)
+            yield from encode_items((self._item(c) for c in rows), fmt)
+
+    def listing_etag(self) -> str:
+        return self._cache.etag(CAFES)
+
+    def _load(self, location, name, limit, cursor):
+        after = self._parse_cursor(cursor)
+        with self._uow_factory(read_only=True) as uow:
+            # Fetch one extra row to know whether another page exists
+            rows = uow.cafes.list_with_counts(location, name, limit + 1 if limit else None, after)
+            return self._build_page(rows, limit)
 
     def create(self, data: Dict[str, Any]):
-        print("A")
         with self._uow_factory() as uow:
-            cafe = Cafe(
-                id=uuid.uuid4(),
-                name=data["name"],
-                description=data.get("description"),
-                logo_url=data.get("logo_url"),
-                location=data["location"],
-            )
+            cafe = self._new_cafe(data)
             uow.cafes.create(cafe)
+            uow.on_commit(lambda: self._cache.invalidate(CAFES))
+            logger.debug("Created cafe %s", cafe.id, extra={"cafe_id": str(cafe.id)})
             return str(cafe.id)
 
     def update(self, data: Dict[str, Any]):
-        print("A")
+        logger.debug("Updating cafe %s", data["id"], extra={"cafe_id": data["id"]})
+        cafe_id = self._parse_id(data["id"])
         with self._uow_factory() as uow:
-            cafe = uow.cafes.get(data["id"])
-            if not cafe:
+            if not uow.cafes.update_by_id(cafe_id, self._changes(data)):
                 raise ValueError("Cafe not found")
-            uow.cafes.update_fields(cafe, {
-                "name": data.get("name"),
-                "description": data.get("description"),
-                "logo_url": data.get("logo_url"),
-                "location": data.get("location"),
-            })
+            # Employee rows carry the cafe name, so both listings go stale
+            uow.on_commit(lambda: self._cache.invalidate(CAFES, EMPLOYEES))
             return True
 
     def delete(self, cafe_id: str):
+        try:
+            ids = [uuid.UUID(cafe_id)]
+        except ValueError:
+            return False
+        return self._delete(ids)["cafes"] > 0
+
+    def delete_many(self, cafe_ids: List[str]) -> Dict[str, int]:
+        """Delete cafes and all their employees in set-based statements; returns affected counts."""
+        return self._delete(self._parse_ids(cafe_ids))
+
+    def _delete(self, ids: List[uuid.UUID]) -> Dict[str, int]:
+        with self._uow_factory() as uow:
+            cafes, employees = uow.cafes.delete_many(ids) # also deletes all employees in the cafes
+            if cafes:
+                uow.on_commit(lambda: self._cache.invalidate(CAFES, EMPLOYEES))
+            return {"cafes": cafes, "employees": employees}
+
+    def import_rows(self, records: Iterable[Record]) -> Dict[str, Any]:
+        """Validate and insert cafes in batches of IMPORT_BATCH_SIZE, one transaction each."""
+        inserted, errors = 0, []
+        for batch in batched(records, IMPORT_BATCH_SIZE):
+            valid = []
+            for row_no, record, problem in batch:
+                if problem:
+                    errors.append({"row": row_no, "errors": [problem]})
+                    continue
+                try:
+                    valid.append((row_no, CafeCreate.model_validate(record).model_dump()))
+                except ValidationError as e:
+                    errors.append({"row": row_no, "errors": validation_messages(e)})
+            if not valid:
+                continue
+            rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "name": data["name"],
+                    "description": data.get("description"),
+                    "logo_url": data.get("logo_url"),
+                    "location": data["location"],
+                }
+                for _, data in valid
+            ]
+            with self._uow_factory() as uow:
+                inserted_ids, failures = insert_with_fallback(uow.db, uow.cafes.insert_many, rows)
+                if inserted_ids:
+                    uow.on_commit(lambda: self._cache.invalidate(CAFES))
+            inserted += len(inserted_ids)
+            errors.extend({"row": valid[i][0], "errors": [msg]} for i, msg in failures.items())
+        errors.sort(key=lambda e: e["row"])
+        return {"inserted": inserted, "failed": len(errors), "errors": errors}
+
+    def export(self, fmt: str) -> Iterator[bytes]:
+        """Encoded export, streamed from a server-side cursor without building a list."""
         with self._uow_factory() as uow:
-            cafe = uow.cafes.get(cafe_id)
-            if not cafe:
-                return False
-            for rel in list(cafe.employees): uow.employees.delete(rel.employee) # delete all employees in the cafe
-            uow.cafes.delete(cafe)
+            yield from encode_rows(uow.cafes.iter_export(), EXPORT_COLUMNS, fmt)
+
+    def _new_cafe(self, data: Dict[str, Any]) -> Cafe:
+        return Cafe(
+            id=uuid.uuid4(),
+            name=data["name"],
+            description=data.get("description"),
+            logo_url=data.get("logo_url"),
+            location=data["location"],
+        )
+
+    def _changes(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "name": data.get("name"),
+            "description": data.get("description"),
+            "logo_url": data.get("logo_url"),
+            "location": data.get("location"),
+        }
+
+    def _build_page(self, rows, limit: Optional[int]):
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([last.employee_count, str(last.id)])
+        return [self._item(c) for c in rows], next_cursor
+
+    @staticmethod
+    def _item(c) -> Dict[str, Any]:
+        return {
+            "id": str(c.id),
+            "name": c.name,
+            "description": c.description,
+            "logo_url": c.logo_url,
+            "location": c.location,
+            "employees": c.employee_count,
+        }
+
+    def _parse_id(self, cafe_id: str) -> uuid.UUID:
+        # A malformed id can't match any cafe
+        try:
+            return uuid.UUID(cafe_id)
+        except ValueError:
+            raise ValueError("Cafe not found")
+
+    def _parse_ids(self, cafe_ids: List[str]) -> List[uuid.UUID]:
+        try:
+            return [uuid.UUID(c) for c in cafe_ids]
+        except ValueError:
+            raise ValueError("Cafe ids must be UUIDs")
+
+    def _parse_cursor(self, cursor: Optional[str]):
+        key = decode_cursor(cursor)
+        if key is None:
+            return None
+        try:
+            count, cafe_id = key
+            return int(count), uuid.UUID(cafe_id)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+
+@timed_methods
+class AsyncCafesService(CafesService):
+    """CafesService over an AsyncUnitOfWork; request handling never leaves the event loop."""
+
+    async def list(
+        self,
+        location: Optional[str],
+        name: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self._cache.aget_or_load(
+            CAFES, (location, name, limit, cursor), lambda: self._aload(location, name, limit, cursor),
+            refresh=primary_pinned.get(),
+        )
+
+    async def _aload(self, location, name, limit, cursor):
+        after = self._parse_cursor(cursor)
+        async with self._uow_factory(read_only=True) as uow:
+            rows = await uow.cafes.list_with_counts(location, name, limit + 1 if limit else None, after)
+            return self._build_page(rows, limit)
+
+    async def create(self, data: Dict[str, Any]):
+        async with self._uow_factory() as uow:
+            cafe = self._new_cafe(data)
+            uow.cafes.create(cafe)
+            uow.on_commit(lambda: self._cache.invalidate(CAFES))
+            return str(cafe.id)
+
+    async def update(self, data: Dict[str, Any]):
+        cafe_id = self._parse_id(data["id"])
+        async with self._uow_factory() as uow:
+            if not await uow.cafes.update_by_id(cafe_id, self._changes(data)):
+                raise ValueError("Cafe not found")
+            # Employee rows carry the cafe name, so both listings go stale
+            uow.on_commit(lambda: self._cache.invalidate(CAFES, EMPLOYEES))
             return True
+
+    async def delete(self, cafe_id: str):
+        try:
+            ids = [uuid.UUID(cafe_id)]
+        except ValueError:
+            return False
+        return (await self._delete(ids))["cafes"] > 0
+
+    async def delete_many(self, cafe_ids: List[str]) -> Dict[str, int]:
+        return await self._delete(self._parse_ids(cafe_ids))
+
+    async def _delete(self, ids: List[uuid.UUID]) -> Dict[str, int]:
+        async with self._uow_factory() as uow:
+            cafes, employees = await uow.cafes.delete_many(ids)
+            if cafes:
+                uow.on_commit(lambda: self._cache.invalidate(CAFES, EMPLOYEES))
+            return {"cafes": cafes, "employees": employees}
@@ -1,78 +1,429 @@
-from typing import Optional, Dict, Any, List
+import logging
+import uuid
+from contextlib import ExitStack
+from datetime import date
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
+from pydantic import ValidationError
+from app.core.metrics import timed_methods
+from app.db.routing import primary_pinned
 from app.domain.models import Employee
-from app.services.unit_of_work import UnitOfWork
-import string, random
+from app.repositories.employees_repo import EXPORT_COLUMNS
+from app.repositories.pagination import encode_cursor, decode_cursor
+from app.domain.schemas import EmployeeCreate, validate_emp_id
+from app.services.bulk_io import encode_items, Record, batched, encode_rows, insert_with_fallback, validation_messages
+from app.services.listing_cache import ListingCache, CAFES, EMPLOYEES
 
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+EMPLOYEE_FIELDS = ("name", "email_address", "phone_number", "gender")
+
+class _RollBack(Exception):
+    """Raised inside a UnitOfWork to discard an atomic batch that had failures."""
+
+@timed_methods
 class EmployeesService:
-    def __init__(self, uow_factory):
+    def __init__(self, uow_factory, cache: Optional[ListingCache] = None):
         self._uow_factory = uow_factory
+        self._cache = cache or ListingCache()
+
+    def list(
+        self,
+        cafe_id: Optional[str] = None,
+        name: Optional[str] = None,
+        gender: Optional[str] = None,
+        location: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        params = (cafe_id, name, gender, location, limit, cursor)
+        # A client pinned to the primary after a write must not be served a cached
+        # listing loaded from the replica before it caught up
+        return self._cache.get_or_load(EMPLOYEES, params, lambda: self._load(*params), refresh=primary_pinned.get())
 
-    def list(self, cafe_id: Optional[str] = None):
+    def delete_many(self, emp_ids: List[str]) -> Dict[str, int]:
+        """Delete employees (and their cafe assignment) with a single DELETE."""
         with self._uow_factory() as uow:
-            employees = uow.employees.list_with_days_and_cafe(cafe_id)
-            return [
-                {
-                    "id": emp.id,
-                    "name": emp.name,
-                    "email_address": emp.email_address,
-                    "phone_number": emp.phone_number,
-                    "gender": emp.gender,
-                    "days_worked": days,
-                    "cafe": cafe_name
-                }
-                for emp, days, cafe_name in employees
-            ]
+            deleted = uow.employees.delete_many(emp_ids)
+            if deleted:
+                uow.on_commit(self._invalidate_listings)
+            return {"employees": deleted}
 
-    def create(self, data: Dict[str, Any]):
-        print("In service create")
+    def import_rows(self, records: Iterable[Record]) -> Dict[str, Any]:
+        """Validate and insert employees in batches of IMPORT_BATCH_SIZE, one transaction each.
+
+        Bad rows are reported and skipped; they never abort the rest of the import.
+        """
+        inserted, errors = 0, []
+        for batch in batched(records, IMPORT_BATCH_SIZE):
+            valid = []
+            for row_no, record, problem in batch:
+                if problem:
+                    errors.append({"row": row_no, "errors": [problem]})
+                    continue
+                try:
+                    valid.append((row_no, EmployeeCreate.model_validate(record).model_dump()))
+                except ValidationError as e:
+                    errors.append({"row": row_no, "errors": validation_messages(e)})
+            if not valid:
+                continue
+            with self._uow_factory() as uow:
+                count, batch_errors = self._import_batch(uow, valid)
+                if count:
+                    uow.on_commit(self._invalidate_listings)
+            inserted += count
+            errors.extend(batch_errors)
+        errors.sort(key=lambda e: e["row"])
+        return {"inserted": inserted, "failed": len(errors), "errors": errors}
+
+    def _import_batch(self, uow, valid: List[Tuple[int, Dict[str, Any]]]):
+        errors = []
+        cafe_ids = {}
+        for row_no, data in valid:
+            if data.get("cafe_id") is not None:
+                try:
+                    cafe_ids[row_no] = uuid.UUID(data["cafe_id"])
+                except ValueError:
+                    cafe_ids[row_no] = None
+        known_cafes = uow.cafes.existing_ids(list({c for c in cafe_ids.values() if c}))
+
+        rows = []
+        for row_no, data in valid:
+            if row_no in cafe_ids and cafe_ids[row_no] not in known_cafes:
+                errors.append({"row": row_no, "errors": ["cafe_id: Cafe not found"]})
+                continue
+            rows.append((row_no, data))
+        if not rows:
+            return 0, errors
+
+        emp_rows = [
+            {
+                "name": data["name"],
+                "email_address": data["email_address"],
+                "phone_number": data["phone_number"],
+                "gender": data["gender"],
+            }
+            for _, data in rows
+        ]
+        inserted, failures = insert_with_fallback(uow.db, uow.employees.insert_many, emp_rows)
+        # Ids come from the sequence; emails are unique, so they tie RETURNING rows back to input rows
+        ids_by_email = {email: emp_id for emp_id, email in inserted}
+
+        mappings = []
+        for i, (row_no, data) in enumerate(rows):
+            emp_id = ids_by_email.pop(data["email_address"], None)
+            if i in failures:
+                errors.append({"row": row_no, "errors": [failures[i]]})
+            elif emp_id is None:
+                errors.append({"row": row_no, "errors": ["email_address: already exists"]})
+            elif row_no in cafe_ids:
+                mappings.append({
+                    "employee_id": emp_id,
+                    "cafe_id": cafe_ids[row_no],
+                    "start_date": data.get("start_date") or date.today(),
+                })
+        uow.employees.insert_mappings(mappings)
+        return len(inserted), errors
+
+    def apply_batch(self, operations: List[Dict[str, Any]], atomic: bool = True) -> Dict[str, Any]:
+        """Apply create/update/transfer/delete operations in one transaction.
+
+        Each kind of change is one set-based statement for the whole batch. With `atomic`
+        any failed operation rolls everything back; otherwise failed operations are
+        reported and skipped and the rest commit.
+        """
+        results = [
+            {"index": i, "op": op["op"], "id": op.get("id"), "status": "ok", "error": None}
+            for i, op in enumerate(operations)
+        ]
+        committed = True
+        try:
+            with self._uow_factory() as uow:
+                self._run_batch(uow, operations, results)
+                if atomic and any(r["error"] for r in results):
+                    raise _RollBack()
+                if not all(r["error"] for r in results):
+                    uow.on_commit(self._invalidate_listings)
+        except _RollBack:
+            committed = False
+            for r in results:
+                if not r["error"]:
+                    r["status"] = "rolled_back"
+        failed = sum(1 for r in results if r["error"])
+        return {
+            "mode": "atomic" if atomic else "per_item",
+            "committed": committed,
+            "applied": len(results) - failed if committed else 0,
+            "failed": failed,
+            "results": results,
+        }
+
+    def _run_batch(self, uow, operations: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+        def fail(index, error):
+            results[index].update(status="failed", error=error)
+
+        # One lock query and one cafe lookup for the whole batch
+        known_employees = uow.employees.lock_existing(list({op["id"] for op in operations if "id" in op}))
+        cafe_ids = {}
+        for i, op in enumerate(operations):
+            if op.get("cafe_id") is not None:
+                try:
+                    cafe_ids[i] = uuid.UUID(op["cafe_id"])
+                except ValueError:
+                    cafe_ids[i] = None
+        known_cafes = uow.cafes.existing_ids(list({c for c in cafe_ids.values() if c}))
+        # A start_date without cafe_id re-dates the current assignment, so there has to be one
+        redated = uow.employees.assigned(list({
+            op["id"] for op in operations
+            if op["op"] == "update" and "start_date" in op and "cafe_id" not in op and op["id"] in known_employees
+        }))
+
+        pending, seen = [], set()
+        for i, op in enumerate(operations):
+            emp_id = op.get("id")
+            if emp_id is not None and emp_id not in known_employees:
+                fail(i, "Employee not found")
+            elif emp_id is not None and emp_id in seen:
+                # Statements run per kind of change, not in list order, so an employee
+                # may only be touched once
+                fail(i, "Employee already changed by an earlier operation in this batch")
+            elif i in cafe_ids and cafe_ids[i] not in known_cafes:
+                fail(i, "cafe_id: Cafe not found")
+            elif op["op"] == "update" and "start_date" in op and "cafe_id" not in op and emp_id not in redated:
+                fail(i, "start_date: no assignment to update")
+            else:
+                pending.append((i, {**op, "cafe_id": cafe_ids.get(i)} if "cafe_id" in op else op))
+            if emp_id is not None:
+                seen.add(emp_id)
+        if not pending:
+            return
+
+        # One try for the whole batch; on a DB error, operation by operation to find the culprits
+        applied, failures = insert_with_fallback(uow.db, lambda items: self._write_batch(uow, items), pending)
+        applied = dict(applied)
+        for n, (i, op) in enumerate(pending):
+            if n in failures:
+                fail(i, failures[n])
+            elif i not in applied:
+                fail(i, "email_address: already exists")
+            else:
+                results[i]["id"] = applied[i]
+
+    def _write_batch(self, uow, items: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, str]]:
+        """Run `items` as set-based statements; returns (index, employee id) of the applied ones."""
+        deletes = [op["id"] for _, op in items if op["op"] == "delete"]
+        updates = [op for _, op in items if op["op"] == "update" and any(f in op for f in EMPLOYEE_FIELDS)]
+        creates = [(i, op) for i, op in items if op["op"] == "create"]
+        # Deletes first, so their emails are free for the creates and updates
+        if deletes:
+            uow.employees.delete_many(deletes)
+        uow.employees.update_many(updates)
+
+        created = {}
+        if creates:
+            inserted = uow.employees.insert_many([{f: op[f] for f in EMPLOYEE_FIELDS} for _, op in creates])
+            ids_by_email = {email: emp_id for emp_id, email in inserted}
+            for i, op in creates:
+                emp_id = ids_by_email.pop(op["email_address"], None)
+                if emp_id is not None:
+                    created[i] = emp_id
+
+        # cafe_id: null unassigns; a start_date alone re-dates the current assignment
+        assign, unassign = [], []
+        for i, op in items:
+            if op["op"] == "delete" or (op["op"] == "create" and i not in created):
+                continue
+            emp_id = created.get(i, op.get("id"))
+            if "cafe_id" in op and op["cafe_id"] is None:
+                unassign.append(emp_id)
+            elif "cafe_id" in op or "start_date" in op:
+                assign.append({"employee_id": emp_id, "cafe_id": op.get("cafe_id"), "start_date": op.get("start_date")})
+        uow.employees.set_mappings(assign)
+        uow.employees.delete_mappings(unassign)
+        return [(i, created.get(i, op.get("id"))) for i, op in items if op["op"] != "create" or i in created]
+
+    def export(self, fmt: str) -> Iterator[bytes]:
+        """Encoded export, streamed from a server-side cursor without building a list."""
+        with self._uow_factory() as uow:
+            yield from encode_rows(uow.employees.iter_export(), EXPORT_COLUMNS, fmt)
+
+    def id_space(self) -> Dict[str, Any]:
+        """How much of the UIXXXXXXX space the id sequence has handed out."""
         with self._uow_factory() as uow:
-            employee_id = self._generate_employee_id(uow)
-            emp = Employee(
-                id=employee_id,
-                name=data["name"],
-                email_address=data["email_address"],
-                phone_number=data["phone_number"],
-                gender=data["gender"],
+            return uow.employees.id_space()
+
+    def stream(
+        self,
+        fmt: str,
+        cafe_id: Optional[str] = None,
+        name: Optional[str] = None,
+        gender: Optional[str] = None,
+        location: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Iterator[bytes]:
+        """The same rows as list() as a JSON array or NDJSON, encoded in batches straight
+        from a server-side cursor; memory use doesn't grow with the result. Bypasses the cache."""
+        # Outside the generator so a bad cursor fails before the response starts
+        after = self._parse_cursor(cursor)
+        return self._stream(fmt, cafe_id, name, gender, location, limit, after)
+
+    def _stream(self, fmt, cafe_id, name, gender, location, limit, after):
+        with ExitStack() as stack:
+            # The session is picked here, within the first next(): iterate_in_threadpool
+            # runs each step in a copy of the context, so the floor can't outlive one step
+            with self._cache.consistent_reads(EMPLOYEES):
+                uow = stack.enter_context(self._uow_factory(read_only=True))
+            rows = uow.employees.iter_with_days_and_cafe(cafe_id, name, gender, location, limit, after)
+            yield from encode_items((self._item(emp) for emp in rows), fmt)
+
+    def listing_etag(self) -> str:
+        return self._cache.etag(EMPLOYEES)
+
+    def _load(self, cafe_id, name, gender, location, limit, cursor):
+        after = self._parse_cursor(cursor)
+        with self._uow_factory(read_only=True) as uow:
+            # Fetch one extra row to know whether another page exists
+            employees = uow.employees.list_with_days_and_cafe(
+                cafe_id, name, gender, location, limit + 1 if limit else None, after
             )
-            print("B")
+            return self._build_page(employees, limit)
+
+    def create(self, data: Dict[str, Any]):
+        with self._uow_factory() as uow:
+            emp = self._new_employee(data)
             uow.employees.create(emp)
-            uow.employees.upsert_mapping(emp.id, data.get("cafe_id"), data.get("start_date"))
+            if data.get("cafe_id") is not None:
+                uow.employees.upsert_mapping(emp.id, data["cafe_id"], data.get("start_date"))
+            uow.on_commit(self._invalidate_listings)
+            logger.debug("Created employee %s", emp.id, extra={"employee_id": emp.id, "cafe_id": data.get("cafe_id")})
             return emp.id
 
     def update(self, data: Dict[str, Any]):
         with self._uow_factory() as uow:
-            emp = uow.employees.get(data["id"])
-            if not emp:
+            # UPDATE, then INSERT ... ON CONFLICT for the assignment: two statements, no loads
+            if not uow.employees.update_by_id(data["id"], self._changes(data)):
                 raise ValueError("Employee not found")
-            for f in ("name", "email_address", "phone_number", "gender"):
-                if data.get(f) is not None:
-                    setattr(emp, f, data[f])
             if "cafe_id" in data or "start_date" in data:
-                uow.employees.upsert_mapping(emp.id, data.get("cafe_id"), data.get("start_date"))
+                uow.employees.upsert_mapping(data["id"], data.get("cafe_id"), data.get("start_date"))
+            uow.on_commit(self._invalidate_listings)
             return True
 
     def delete(self, emp_id: str):
-        print("In service delete start")
         with self._uow_factory() as uow:
-            print("In service delete")
             emp = uow.employees.get(emp_id)
-            print(emp)
+            logger.debug("Deleting employee %s (found=%s)", emp_id, emp is not None, extra={"employee_id": emp_id})
             if not emp:
                 return False
             uow.employees.delete_mapping(emp_id)
             uow.employees.delete(emp)
+            uow.on_commit(self._invalidate_listings)
             return True
 
+    def _invalidate_listings(self):
+        # Employee writes change employee rows and the per-cafe employee counts
+        self._cache.invalidate(EMPLOYEES, CAFES)
+
+    def _new_employee(self, data: Dict[str, Any]) -> Employee:
+        # id is left to the employee_id_seq server default
+        return Employee(
+            name=data["name"],
+            email_address=data["email_address"],
+            phone_number=data["phone_number"],
+            gender=data["gender"],
+        )
+
+    def _changes(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {f: data.get(f) for f in EMPLOYEE_FIELDS}
+
+    def _build_page(self, employees, limit: Optional[int]):
+        next_cursor = None
+        if limit and len(employees) > limit:
+            employees = employees[:limit]
+            last = employees[-1]
+            next_cursor = encode_cursor([last.start_date.isoformat() if last.start_date else None, last.id])
+        return [self._item(emp) for emp in employees], next_cursor
+
+    @staticmethod
+    def _item(emp) -> Dict[str, Any]:
+        return {
+            "id": emp.id,
+            "name": emp.name,
+            "email_address": emp.email_address,
+            "phone_number": emp.phone_number,
+            "gender": emp.gender,
+            "days_worked": emp.days_worked,
+            "cafe": emp.cafe_name
+        }
+
+    def _parse_cursor(self, cursor: Optional[str]):
+        key = decode_cursor(cursor)
+        if key is None:
+            return None
+        try:
+            start, emp_id = key
+            return (date.fromisoformat(start) if start is not None else None), validate_emp_id(emp_id)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+
+
+@timed_methods
+class AsyncEmployeesService(EmployeesService):
+    """EmployeesService over an AsyncUnitOfWork; request handling never leaves the event loop."""
+
+    async def list(
+        self,
+        cafe_id: Optional[str] = None,
+        name: Optional[str] = None,
+        gender: Optional[str] = None,
+        location: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        params = (cafe_id, name, gender, location, limit, cursor)
+        return await self._cache.aget_or_load(
+            EMPLOYEES, params, lambda: self._aload(*params), refresh=primary_pinned.get()
+        )
+
+    async def _aload(self, cafe_id, name, gender, location, limit, cursor):
+        after = self._parse_cursor(cursor)
+        async with self._uow_factory(read_only=True) as uow:
+            employees = await uow.employees.list_with_days_and_cafe(
+                cafe_id, name, gender, location, limit + 1 if limit else None, after
+            )
+            return self._build_page(employees, limit)
+
+    async def create(self, data: Dict[str, Any]):
+        async with self._uow_factory() as uow:
+            emp = self._new_employee(data)
+            await uow.employees.create(emp)
+            if data.get("cafe_id") is not None:
+                await uow.employees.upsert_mapping(emp.id, data["cafe_id"], data.get("start_date"))
+            uow.on_commit(self._invalidate_listings)
+            return emp.id
+
+    async def update(self, data: Dict[str, Any]):
+        async with self._uow_factory() as uow:
+            if not await uow.employees.update_by_id(data["id"], self._changes(data)):
+                raise ValueError("Employee not found")
+            if "cafe_id" in data or "start_date" in data:
+                await uow.employees.upsert_mapping(data["id"], data.get("cafe_id"), data.get("start_date"))
+            uow.on_commit(self._invalidate_listings)
+            return True
+
+    async def delete(self, emp_id: str):
+        async with self._uow_factory() as uow:
+            emp = await uow.employees.get(emp_id)
+            if not emp:
+                return False
+            await uow.employees.delete_mapping(emp_id)
+            await uow.employees.delete(emp)
+            uow.on_commit(self._invalidate_listings)
+            return True
 
-    def _generate_employee_id(self, uow) -> str:
-        characters = string.digits
-        max_attempts = 10
-        
-        for _ in range(max_attempts):
-            random_part = ''.join(random.choices(characters, k=7))
-            employee_id = f"UI{random_part}"
-            
-            if not uow.employees.get(employee_id):
-                return employee_id
-        
-        raise ValueError("Unable to generate unique employee ID")
\ No newline at end of file
+    async def delete_many(self, emp_ids: List[str]) -> Dict[str, int]:
+        async with self._uow_factory() as uow:
+            deleted = await uow.employees.delete_many(emp_ids)
+            if deleted:
+                uow.on_commit(self._invalidate_listings)
+            return {"employees": deleted}
@@ -0,0 +1,113 @@
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Optional
+from app.core.cache import CacheBackend, NullCache
+from app.db.routing import primary_pinned, replica_floor
+
+logger = logging.getLogger(__name__)
+
+CAFES = "cafes"
+EMPLOYEES = "employees"
+
+class ListingCache:
+    """Read-through cache for list queries, invalidated by bumping a per-namespace revision.
+
+    The revision is part of every key and is read *before* the database is queried,
+    so a read that races a write can only populate the superseded revision.
+
+    With a read replica, `write_position` returns the primary's WAL position. Each
+    invalidation records it with the new revision, and loads only use a replica that has
+    replayed it (consistent_reads), so pre-write rows from a lagging replica are never
+    stored or served under the new revision and its ETag.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: float = 30.0,
+        write_position: Optional[Callable[[], str]] = None,
+    ):
+        self._backend = backend or NullCache()
+        self._ttl = ttl
+        self._instance = uuid.uuid4().hex[:8]
+        # Per-process backends already roll their ETags over every TTL, which bounds
+        # staleness; only a shared backend's tags can outlive a stale load
+        self._write_position = write_position if self._backend.shared else None
+
+    def revision(self, namespace: str) -> int:
+        return self._backend.get_counter(f"{namespace}:rev")
+
+    def etag(self, namespace: str) -> str:
+        """Version token for a listing; changes whenever a committed write invalidates it."""
+        if self._backend.shared:
+            return f'W/"{namespace}-{self.revision(namespace)}"'
+        # Per-process counters don't see writes handled by other workers: scope the
+        # tag to this process and let it roll over every TTL, bounding staleness the
+        # same way the in-process cache entries are bounded
+        bucket = int(time.time() // self._ttl) if self._ttl > 0 else 0
+        return f'W/"{namespace}-{self._instance}-{bucket}-{self.revision(namespace)}"'
+
+    def invalidate(self, *namespaces: str):
+        revisions = {namespace: self._backend.incr(f"{namespace}:rev") for namespace in namespaces}
+        if self._write_position is None:
+            return
+        try:
+            # Read after the increments, so it covers every write whose revision is <= these
+            position = self._write_position()
+        except Exception as e:
+            # The write has committed; without a position, loads go to the primary
+            logger.warning("Could not read the primary WAL position: %s", e)
+            return
+        for namespace, revision in revisions.items():
+            self._backend.set(f"{namespace}:written", [revision, position], None)
+
+    @contextmanager
+    def consistent_reads(self, namespace: str):
+        """Replica reads inside the block see every write up to the current revision: the
+        replica must have replayed the position recorded with it (app.db.routing.replica_floor),
+        and reads go to the primary while that position isn't known."""
+        if self._write_position is None:
+            yield
+            return
+        revision = self.revision(namespace)
+        written = self._backend.get(f"{namespace}:written") if revision else None
+        if written is not None and written[0] >= revision:
+            token, var = replica_floor.set(written[1]), replica_floor
+        elif revision:
+            # Recorded by an older write, not yet recorded, or lost (e.g. evicted)
+            token, var = primary_pinned.set(True), primary_pinned
+        else:
+            token, var = None, None
+        try:
+            yield
+        finally:
+            if var is not None:
+                var.reset(token)
+
+    def _key(self, namespace: str, params: tuple) -> str:
+        return f"{namespace}:{self.revision(namespace)}:{json.dumps(params, default=str)}"
+
+    def get_or_load(self, namespace: str, params: tuple, loader: Callable[[], Any], refresh: bool = False):
+        """Cached value, loaded (and stored) on a miss; `refresh` always reloads and overwrites
+        the entry, e.g. for a read from the primary replacing one taken from a lagging replica."""
+        key = self._key(namespace, params)
+        value = None if refresh else self._backend.get(key)
+        if value is None:
+            with self.consistent_reads(namespace):
+                value = loader()
+            self._backend.set(key, value, self._ttl)
+        return value
+
+    async def aget_or_load(
+        self, namespace: str, params: tuple, loader: Callable[[], Awaitable[Any]], refresh: bool = False
+    ):
+        key = self._key(namespace, params)
+        value = None if refresh else self._backend.get(key)
+        if value is None:
+            with self.consistent_reads(namespace):
+                value = await loader()
+            self._backend.set(key, value, self._ttl)
+        return value
@@ -0,0 +1,142 @@
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Sequence, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.core.metrics import timed_methods
+from app.core.storage import ObjectStore
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# Pillow format -> stored extension; anything else is rejected
+IMAGE_FORMATS = {"PNG": "png", "JPEG": "jpg", "GIF": "gif", "WEBP": "webp"}
+# Refuse to decode anything larger (decompression bombs); far above any real logo
+MAX_PIXELS = 25_000_000
+
+def _pil():
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError("Logo uploads require the 'pillow' package") from e
+    return Image
+
+def logo_key(digest: str, ext: str) -> str:
+    return f"cafes/{digest}.{ext}"
+
+def thumbnail_key(digest: str, size: int) -> str:
+    return f"cafes/thumbs/{digest}-{size}.webp"
+
+def stage_upload(src: BinaryIO, staged: Path, max_bytes: int) -> Tuple[str, int]:
+    """Copy `src` to `staged` in chunks, hashing as it goes; returns (sha256 hex, size)."""
+    digest = hashlib.sha256()
+    size = 0
+    with staged.open("wb") as out:
+        while chunk := src.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ValueError("File too large")
+            digest.update(chunk)
+            out.write(chunk)
+    if size == 0:
+        raise ValueError("File is empty")
+    return digest.hexdigest(), size
+
+def image_extension(path: Path) -> str:
+    """Extension for the image at `path`; reads only the header."""
+    Image = _pil()
+    try:
+        with Image.open(path) as image:
+            fmt = image.format
+            width, height = image.size
+    except Exception:
+        raise ValueError("File is not a supported image")
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format {fmt}; use PNG, JPEG, GIF or WebP")
+    if width * height > MAX_PIXELS:
+        raise ValueError("Image dimensions too large")
+    return IMAGE_FORMATS[fmt]
+
+class ThumbnailWorker:
+    """Renders thumbnails on a small thread pool (Pillow releases the GIL while it resizes
+    and encodes), so an upload returns as soon as the original is stored."""
+
+    def __init__(self, store: ObjectStore, sizes: Sequence[int], workers: int):
+        self.store = store
+        self.sizes = sorted(sizes)
+        self._workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: set = set()
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, digest: str):
+        with self._lock:
+            # The same logo uploaded twice in a row is rendered once
+            if digest in self._pending:
+                return
+            self._pending.add(digest)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="thumbnails")
+        self._executor.submit(self._render, key, digest)
+
+    def _render(self, key: str, digest: str):
+        try:
+            missing = [s for s in self.sizes if not self.store.exists(thumbnail_key(digest, s))]
+            if not missing:
+                return
+            Image = _pil()
+            with self.store.open(key) as src, Image.open(src) as image:
+                image.seek(0)  # first frame of an animated GIF
+                image = image.convert("RGBA")
+                # Largest first, each one shrunk from the previous
+                for size in reversed(missing):
+                    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+                    out = io.BytesIO()
+                    image.save(out, "WEBP", quality=85)
+                    self.store.put_bytes(thumbnail_key(digest, size), out.getvalue())
+            logger.debug("Rendered %d thumbnail(s) for %s", len(missing), key)
+        except Exception:
+            logger.exception("Thumbnail rendering failed for %s", key)
+        finally:
+            with self._lock:
+                self._pending.discard(digest)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+@timed_methods
+class LogoService:
+    def __init__(self, store: ObjectStore, thumbnails: ThumbnailWorker, max_bytes: int):
+        self.store = store
+        self.thumbnails = thumbnails
+        self.max_bytes = max_bytes
+
+    async def save(self, src: BinaryIO) -> Dict:
+        """Store an uploaded logo under its content hash and queue its thumbnails.
+
+        Re-uploading the same image reuses the stored file.
+        """
+        return await run_in_threadpool(self._save, src)
+
+    def _save(self, src: BinaryIO) -> Dict:
+        with self.store.staging_file() as staged:
+            digest, size = stage_upload(src, staged, self.max_bytes)
+            key = logo_key(digest, image_extension(staged))
+            deduplicated = self.store.exists(key)
+            if not deduplicated:
+                self.store.put_file(key, staged)
+        self.thumbnails.submit(key, digest)
+        return {
+            "file_path": self.store.url(key),
+            # Rendered in the background; may 404 for a moment after the upload returns
+            "thumbnails": {str(s): self.store.url(thumbnail_key(digest, s)) for s in self.thumbnails.sizes},
+            "sha256": digest,
+            "size": size,
+            "deduplicated": deduplicated,
+        }
@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.metrics import timed_methods
+from app.repositories.pagination import encode_cursor, decode_cursor
+from app.repositories.search_repo import SEARCH_TYPES, prefix_tsquery
+
+@timed_methods
+class SearchService:
+    """Ranked full-text lookup over employees (name, email) and cafes (name, location,
+    description). Every word of the query matches as a word prefix; name matches rank first."""
+
+    def __init__(self, uow_factory):
+        self._uow_factory = uow_factory
+
+    def search(
+        self,
+        query: str,
+        type: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        tsquery, types, after = self._parse(query, type, cursor)
+        with self._uow_factory(read_only=True) as uow:
+            # Fetch one extra row to know whether another page exists
+            rows = uow.search.search(tsquery, types, limit + 1, after)
+            return self._build_page(rows, limit)
+
+    def _parse(self, query: str, type: Optional[str], cursor: Optional[str]):
+        tsquery = prefix_tsquery(query)
+        if tsquery is None:
+            raise ValueError("Search query must contain a letter or digit")
+        types = (type,) if type else SEARCH_TYPES
+        return tsquery, types, self._parse_cursor(cursor)
+
+    def _build_page(self, rows, limit: int):
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([last.score, last.type, last.id])
+        return [self._item(r) for r in rows], next_cursor
+
+    @staticmethod
+    def _item(r) -> Dict[str, Any]:
+        return {
+            "type": r.type,
+            "id": r.id,
+            "name": r.name,
+            "score": r.score,
+            "email_address": r.email_address,
+            "cafe": r.cafe,
+            "location": r.location,
+        }
+
+    def _parse_cursor(self, cursor: Optional[str]):
+        key = decode_cursor(cursor)
+        if key is None:
+            return None
+        try:
+            score, type, hit_id = key
+            return float(score), str(type), str(hit_id)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+
+@timed_methods
+class AsyncSearchService(SearchService):
+    """SearchService over an AsyncUnitOfWork."""
+
+    async def search(
+        self,
+        query: str,
+        type: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        tsquery, types, after = self._parse(query, type, cursor)
+        async with self._uow_factory(read_only=True) as uow:
+            rows = await uow.search.search(tsquery, types, limit + 1, after)
+            return self._build_page(rows, limit)
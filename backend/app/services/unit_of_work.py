@@ -1,25 +1,92 @@
-from contextlib import AbstractContextManager
-from typing import Callable
+from contextlib import AbstractContextManager, AbstractAsyncContextManager
+import inspect
+import time
+from typing import Callable, List
+from app.core.metrics import uow_transactions
 from sqlalchemy.orm import Session
-from app.repositories.cafes_repo import CafesRepo
-from app.repositories.employees_repo import EmployeesRepo
+from app.repositories.cafes_repo import CafesRepo, AsyncCafesRepo
+from app.repositories.employees_repo import EmployeesRepo, AsyncEmployeesRepo
+from app.repositories.search_repo import SearchRepo, AsyncSearchRepo
 
 class UnitOfWork(AbstractContextManager):
-    def __init__(self, session_factory: Callable[[], Session]):
+    """One transaction. A read_only unit of work (e.g. on a replica session) is always
+    rolled back on exit; nothing it does is committed."""
+
+    def __init__(self, session_factory: Callable[[], Session], read_only: bool = False):
         self._session_factory = session_factory
+        self.read_only = read_only
         self.db: Session | None = None
         self.cafes: CafesRepo | None = None
         self.employees: EmployeesRepo | None = None
+        self.search: SearchRepo | None = None
+        self._after_commit: List[Callable[[], None]] = []
+
+    def on_commit(self, callback: Callable[[], None]):
+        """Run callback only once the transaction has committed (e.g. cache invalidation)."""
+        self._after_commit.append(callback)
 
     def __enter__(self):
         self.db = self._session_factory()
         self.cafes = CafesRepo(self.db)
         self.employees = EmployeesRepo(self.db)
+        self.search = SearchRepo(self.db)
         return self
 
     def __exit__(self, exc_type, exc, tb):
-        if exc:
-            self.db.rollback()
-        else:
-            self.db.commit()
-        self.db.close()
+        started = time.perf_counter()
+        outcome = "rollback" if exc else "commit_error"
+        try:
+            if exc:
+                self.db.rollback()
+            elif self.read_only:
+                self.db.rollback()
+                outcome = "read_only"
+            else:
+                self.db.commit()
+                outcome = "commit"
+                for callback in self._after_commit:
+                    callback()
+        finally:
+            uow_transactions.observe(time.perf_counter() - started, outcome=outcome)
+            self.db.close()
+
+class AsyncUnitOfWork(AbstractAsyncContextManager):
+    def __init__(self, session_factory, read_only: bool = False):
+        # session_factory may be a coroutine function (ReadRouter.asession)
+        self._session_factory = session_factory
+        self.read_only = read_only
+        self.db = None
+        self.cafes: AsyncCafesRepo | None = None
+        self.employees: AsyncEmployeesRepo | None = None
+        self.search: AsyncSearchRepo | None = None
+        self._after_commit: List[Callable[[], None]] = []
+
+    def on_commit(self, callback: Callable[[], None]):
+        self._after_commit.append(callback)
+
+    async def __aenter__(self):
+        self.db = self._session_factory()
+        if inspect.isawaitable(self.db):
+            self.db = await self.db
+        self.cafes = AsyncCafesRepo(self.db)
+        self.employees = AsyncEmployeesRepo(self.db)
+        self.search = AsyncSearchRepo(self.db)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        started = time.perf_counter()
+        outcome = "rollback" if exc else "commit_error"
+        try:
+            if exc:
+                await self.db.rollback()
+            elif self.read_only:
+                await self.db.rollback()
+                outcome = "read_only"
+            else:
+                await self.db.commit()
+                outcome = "commit"
+                for callback in self._after_commit:
+                    callback()
+        finally:
+            uow_transactions.observe(time.perf_counter() - started, outcome=outcome)
+            await self.db.close()
@@ -0,0 +1,446 @@
+"""Load-test every cafe and employee route and record latency, throughput and queries/request.
+
+Seeds a deterministic data set of --cafes/--employees rows (see app/seed.py), then
+runs each scenario either in-process through httpx's ASGI transport or against a
+real uvicorn server, and writes the numbers to benchmarks/results/ as JSON.
+
+    python -m benchmarks.api_suite --cafes 1000 --employees 100000
+    python -m benchmarks.api_suite --mode both --compare benchmarks/results/<baseline>.json
+
+Queries per request are counted with engine events in the in-process (asgi) mode
+and read from the Server-Timing header in uvicorn mode; the header is sent before a
+streamed body, so exports show 0 there.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, drive, start_server, wait_until_up
+
+RESULTS_DIR = BACKEND_DIR / "benchmarks" / "results"
+API = "/api"
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+@dataclass
+class Scenario:
+    name: str
+    # (ctx, i) -> (method, url, httpx request kwargs)
+    build: Callable[[Dict[str, Any], int], tuple]
+    # Unmeasured setup, e.g. creating the rows a delete scenario removes
+    prepare: Optional[Callable[[httpx.AsyncClient, Dict[str, Any], int], Awaitable[None]]] = None
+    ok_status: tuple = (200,)
+    # Fraction of --requests to run; keeps whole-table exports from dominating the run
+    share: float = 1.0
+
+    def count(self, requests: int) -> int:
+        return max(int(requests * self.share), 1)
+
+
+class QueryCounter:
+    """Counts statements sent to the database by the given sync engines."""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self._lock = threading.Lock()
+        self.value = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.value += 1
+
+    def reset(self):
+        with self._lock:
+            self.value = 0
+
+
+# --- setup helpers -------------------------------------------------------------
+
+def _insert_cafes(n: int) -> List[str]:
+    from app.db.session import SessionLocal
+    from app.repositories.cafes_repo import CafesRepo
+
+    db = SessionLocal()
+    try:
+        rows = [{"name": f"Doomed {i}", "location": "Nowhere"} for i in range(n)]
+        ids = [str(i) for i in CafesRepo(db).insert_many(rows)]
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def _insert_employees(n: int, tag: str) -> List[str]:
+    from app.db.session import SessionLocal
+    from app.repositories.employees_repo import EmployeesRepo
+
+    db = SessionLocal()
+    try:
+        rows = [
+            {"name": "Doomed", "email_address": f"doomed.{tag}.{i}@example.com", "phone_number": "91234567", "gender": "Male"}
+            for i in range(n)
+        ]
+        ids = [emp_id for emp_id, _ in EmployeesRepo(db).insert_many(rows)]
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def _load_context(tag: str) -> Dict[str, Any]:
+    from sqlalchemy import select
+    from app.db.session import SessionLocal
+    from app.domain.models import Cafe, Employee
+
+    db = SessionLocal()
+    try:
+        cafes = db.execute(select(Cafe.id, Cafe.name, Cafe.location).order_by(Cafe.id).limit(200)).all()
+        employees = db.execute(
+            select(Employee.id, Employee.name, Employee.email_address).order_by(Employee.id).limit(200)
+        ).all()
+    finally:
+        db.close()
+    if not cafes or not employees:
+        raise SystemExit("benchmark needs at least one cafe and one employee; drop --no-seed")
+    return {
+        "tag": tag,
+        "cafe_ids": [str(c.id) for c in cafes],
+        "locations": sorted({c.location for c in cafes}),
+        # First words of existing names, so ?name= prefixes match whatever data is loaded
+        "name_prefixes": sorted({c.name.split()[0] for c in cafes}),
+        "employee_ids": [e.id for e in employees],
+        "employee_names": [e.name for e in employees],
+        # The address minus its first part ('kevin.nelson.1@x.com' -> 'nelson.1@x.com'):
+        # a substring of the email, not a prefix of it
+        "email_fragments": [re.split(r"[@._+-]", e.email_address, maxsplit=1)[-1] for e in employees],
+    }
+
+
+async def _collect_cursors(client: httpx.AsyncClient, path: str, ctx_key: str, ctx: Dict[str, Any], pages: int = 20):
+    cursors, cursor = [None], None
+    for _ in range(pages):
+        r = await client.get(path, params={"limit": 50, **({"cursor": cursor} if cursor else {})})
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        cursors.append(cursor)
+    ctx[ctx_key] = cursors
+
+
+def _pick(items: List[Any], i: int):
+    return items[i % len(items)]
+
+
+def _csv(header: List[str], rows: List[List[Any]]) -> bytes:
+    import csv
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buf.getvalue().encode()
+
+
+def _page_params(cursors: List[Optional[str]], i: int) -> Dict[str, Any]:
+    cursor = _pick(cursors, i)
+    return {"limit": 50, **({"cursor": cursor} if cursor else {})}
+
+
+# --- scenarios -----------------------------------------------------------------
+
+async def _prepare_cafe_pages(client, ctx, n):
+    await _collect_cursors(client, f"{API}/cafes", "cafe_cursors", ctx)
+
+
+async def _prepare_employee_pages(client, ctx, n):
+    await _collect_cursors(client, f"{API}/employees", "employee_cursors", ctx)
+
+
+async def _prepare_cafe_etag(client, ctx, n):
+    ctx["cafe_etag"] = (await client.get(f"{API}/cafes")).headers["ETag"]
+
+
+async def _prepare_employee_etag(client, ctx, n):
+    ctx["employee_etag"] = (await client.get(f"{API}/employees")).headers["ETag"]
+
+
+async def _prepare_doomed_cafes(client, ctx, n):
+    ctx["doomed_cafes"] = _insert_cafes(n)
+
+
+async def _prepare_doomed_cafe_groups(client, ctx, n):
+    ctx["doomed_cafe_groups"] = _insert_cafes(n * 5)
+
+
+async def _prepare_doomed_employees(client, ctx, n):
+    ctx["doomed_employees"] = _insert_employees(n, f"{ctx['tag']}.single")
+
+
+async def _prepare_doomed_employee_groups(client, ctx, n):
+    ctx["doomed_employee_groups"] = _insert_employees(n * 5, f"{ctx['tag']}.group")
+
+
+def _import_cafes(ctx, i):
+    rows = [[f"Import {i}-{j}", "Bulk imported", "Singapore"] for j in range(100)]
+    files = {"file": ("cafes.csv", _csv(["name", "description", "location"], rows), "text/csv")}
+    return "POST", f"{API}/cafes/import", {"files": files}
+
+
+def _import_employees(ctx, i):
+    lines = [
+        json.dumps({
+            "name": f"Imported {j}",
+            "email_address": f"imp.{ctx['tag']}.{i}.{j}@example.com",
+            "phone_number": "81234567",
+            "gender": "Female",
+            "cafe_id": _pick(ctx["cafe_ids"], i + j),
+        })
+        for j in range(100)
+    ]
+    files = {"file": ("employees.ndjson", "\n".join(lines).encode(), "application/x-ndjson")}
+    return "POST", f"{API}/employees/import", {"files": files}
+
+
+SCENARIOS: List[Scenario] = [
+    # cafes.py
+    Scenario("list_cafes", lambda ctx, i: ("GET", f"{API}/cafes", {})),
+    Scenario("list_cafes_by_location", lambda ctx, i: ("GET", f"{API}/cafes", {"params": {"location": _pick(ctx["locations"], i)}})),
+    Scenario("list_cafes_by_name", lambda ctx, i: (
+        "GET", f"{API}/cafes", {"params": {"name": ctx["name_prefixes"][i % len(ctx["name_prefixes"])]}},
+    )),
+    Scenario("list_cafes_paged", lambda ctx, i: ("GET", f"{API}/cafes", {"params": _page_params(ctx["cafe_cursors"], i)}),
+             prepare=_prepare_cafe_pages),
+    Scenario("list_cafes_not_modified", lambda ctx, i: ("GET", f"{API}/cafes", {"headers": {"If-None-Match": ctx["cafe_etag"]}}),
+             prepare=_prepare_cafe_etag, ok_status=(304, 200)),
+    Scenario("create_cafe", lambda ctx, i: ("POST", f"{API}/cafes", {"json": {"name": f"Bench {i}", "location": "Singapore"}}),
+             ok_status=(201,)),
+    Scenario("update_cafe", lambda ctx, i: ("PUT", f"{API}/cafes", {"json": {"id": _pick(ctx["cafe_ids"], i), "description": f"Updated {i}"}})),
+    Scenario("delete_cafe", lambda ctx, i: ("DELETE", f"{API}/cafes", {"params": {"id": ctx["doomed_cafes"][i]}}),
+             prepare=_prepare_doomed_cafes),
+    Scenario("delete_many_cafes", lambda ctx, i: ("POST", f"{API}/cafes/delete-many", {"json": {"ids": ctx["doomed_cafe_groups"][i * 5:i * 5 + 5]}}),
+             prepare=_prepare_doomed_cafe_groups),
+    Scenario("import_cafes", _import_cafes, share=0.1),
+    Scenario("export_cafes", lambda ctx, i: ("GET", f"{API}/cafes/export", {"params": {"format": "csv"}}), share=0.05),
+    Scenario("upload_logo", lambda ctx, i: ("POST", f"{API}/cafes/upload-logo", {"files": {"file": ("logo.png", b"\x89PNG" + b"\0" * 4096, "image/png")}})),
+    # employees.py
+    Scenario("list_employees", lambda ctx, i: ("GET", f"{API}/employees", {})),
+    Scenario("list_employees_by_cafe", lambda ctx, i: ("GET", f"{API}/employees", {"params": {"cafe": _pick(ctx["cafe_ids"], i)}})),
+    Scenario("list_employees_filtered", lambda ctx, i: ("GET", f"{API}/employees", {"params": {
+        "gender": "Female", "location": _pick(ctx["locations"], i), "limit": 100}})),
+    Scenario("list_employees_paged", lambda ctx, i: ("GET", f"{API}/employees", {"params": _page_params(ctx["employee_cursors"], i)}),
+             prepare=_prepare_employee_pages),
+    Scenario("list_employees_not_modified", lambda ctx, i: ("GET", f"{API}/employees", {"headers": {"If-None-Match": ctx["employee_etag"]}}),
+             prepare=_prepare_employee_etag, ok_status=(304, 200)),
+    Scenario("search_by_name", lambda ctx, i: ("GET", f"{API}/search", {"params": {"q": _pick(ctx["employee_names"], i)}})),
+    Scenario("search_by_email_fragment", lambda ctx, i: (
+        "GET", f"{API}/search", {"params": {"q": _pick(ctx["email_fragments"], i), "type": "employee"}},
+    )),
+    Scenario("employee_id_space", lambda ctx, i: ("GET", f"{API}/employees/id-space", {})),
+    Scenario("create_employee", lambda ctx, i: ("POST", f"{API}/employees", {"json": {
+        "name": f"Bench {i}", "email_address": f"bench.{ctx['tag']}.{i}@example.com", "phone_number": "91234567",
+        "gender": "Male", "cafe_id": _pick(ctx["cafe_ids"], i)}}), ok_status=(201,)),
+    Scenario("update_employee", lambda ctx, i: ("PUT", f"{API}/employees", {"json": {
+        "id": _pick(ctx["employee_ids"], i), "phone_number": f"8{i % 10**7:07d}"}})),
+    Scenario("delete_employee", lambda ctx, i: ("DELETE", f"{API}/employees", {"params": {"id": ctx["doomed_employees"][i]}}),
+             prepare=_prepare_doomed_employees),
+    Scenario("delete_many_employees", lambda ctx, i: ("POST", f"{API}/employees/delete-many", {"json": {"ids": ctx["doomed_employee_groups"][i * 5:i * 5 + 5]}}),
+             prepare=_prepare_doomed_employee_groups),
+    Scenario("import_employees", _import_employees, share=0.1),
+    Scenario("export_employees", lambda ctx, i: ("GET", f"{API}/employees/export", {"params": {"format": "ndjson"}}), share=0.05),
+]
+
+
+# --- runner --------------------------------------------------------------------
+
+async def run_scenarios(
+    client: httpx.AsyncClient,
+    scenarios: List[Scenario],
+    ctx: Dict[str, Any],
+    requests: int,
+    concurrency: int,
+    counter: Optional[QueryCounter] = None,
+) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for scenario in scenarios:
+        n = scenario.count(requests)
+        if scenario.prepare:
+            await scenario.prepare(client, ctx, n)
+
+        reported = []
+
+        async def send(i, scenario=scenario):
+            method, url, kwargs = scenario.build(ctx, i)
+            r = await client.request(method, url, **kwargs)
+            match = SERVER_TIMING_QUERIES.search(r.headers.get("server-timing", ""))
+            if match:
+                reported.append(int(match.group(1)))
+            return r
+
+        if counter:
+            counter.reset()
+        stats = await drive(send, n, min(concurrency, n), scenario.ok_status)
+        if counter:
+            stats["queries_per_request"] = round(counter.value / n, 2)
+        else:
+            stats["queries_per_request"] = round(sum(reported) / len(reported), 2) if reported else None
+        results[scenario.name] = stats
+        print(f"  {scenario.name:<30} {stats}")
+    return results
+
+
+async def run_asgi(scenarios, ctx, args) -> Dict[str, Dict[str, Any]]:
+    from app.db.session import engine, async_engine
+    from app.main import app
+
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    counter = QueryCounter(engines)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.get(f"{API}/cafes")  # warm up imports, pool and caches
+        return await run_scenarios(client, scenarios, ctx, args.requests, args.concurrency, counter)
+
+
+async def _run_http(base_url, scenarios, ctx, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        await client.get(f"{API}/cafes")
+        return await run_scenarios(client, scenarios, ctx, args.requests, args.concurrency)
+
+
+def run_uvicorn(scenarios, ctx, args, env) -> Dict[str, Dict[str, Any]]:
+    proc = start_server(args.port, env)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_until_up(base_url)
+        return asyncio.run(_run_http(base_url, scenarios, ctx, args))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*cmd):
+        return subprocess.run(["git", *cmd], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def compare(current: Dict[str, Any], baseline_path: Path, threshold: float) -> List[str]:
+    """Print per-scenario deltas against a previous results file; return the regressions."""
+    baseline = json.loads(baseline_path.read_text())
+    regressions = []
+    print(f"\nCompared with {baseline_path} ({(baseline['meta'].get('commit') or '?')[:10]}):")
+    for mode, scenarios in current["results"].items():
+        for name, stats in scenarios.items():
+            old = baseline["results"].get(mode, {}).get(name)
+            if not old:
+                continue
+            rps_delta = (stats["rps"] - old["rps"]) / old["rps"] * 100 if old["rps"] else 0.0
+            p95_delta = (stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+            flag = ""
+            if rps_delta < -threshold or p95_delta > threshold:
+                flag = "  << regression"
+                regressions.append(f"{mode}/{name}")
+            print(f"  {mode:<8} {name:<30} rps {rps_delta:+7.1f}%   p95 {p95_delta:+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cafes", type=int, default=100)
+    parser.add_argument("--employees", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated data")
+    parser.add_argument("--no-seed", action="store_true", help="Benchmark the data already in the database")
+    parser.add_argument("--mode", choices=("asgi", "uvicorn", "both"), default="asgi")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario (before its share)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--only", action="append", help="Run only scenarios whose name contains this; repeatable")
+    parser.add_argument("--cache", choices=("none", "memory", "redis"), default="none",
+                        help="CACHE_BACKEND for the app; 'none' measures the database path")
+    parser.add_argument("--db-async", action="store_true", help="Serve through the AsyncSession stack")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change that counts as a regression")
+    args = parser.parse_args()
+
+    # Must be in place before app.* reads Settings, here and in the uvicorn child
+    env = {
+        "CACHE_BACKEND": args.cache,
+        "DB_ASYNC": "true" if args.db_async else "false",
+        "LOG_LEVEL": "WARNING",  # per-request access lines would compete with the load
+    }
+    os.environ.update(env)
+
+    scenarios = [s for s in SCENARIOS if not args.only or any(o in s.name for o in args.only)]
+    if not args.no_seed:
+        from app.db import migrations
+        from app.seed import seed_scaled
+
+        migrations.upgrade()
+        started = time.perf_counter()
+        seed_scaled(args.cafes, args.employees, args.seed)
+        print(f"seeded in {time.perf_counter() - started:.1f}s")
+
+    revision = git_revision()
+    results = {}
+    modes = ("asgi", "uvicorn") if args.mode == "both" else (args.mode,)
+    for mode in modes:
+        # Fresh tag per mode so unique emails from the previous mode don't collide
+        ctx = _load_context(uuid.uuid4().hex[:8])
+        print(f"{mode}:")
+        if mode == "asgi":
+            results[mode] = asyncio.run(run_asgi(scenarios, ctx, args))
+        else:
+            results[mode] = run_uvicorn(scenarios, ctx, args, env)
+
+    report = {
+        "meta": {
+            **revision,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cafes": None if args.no_seed else args.cafes,
+            "employees": None if args.no_seed else args.employees,
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cache": args.cache,
+            "db_async": args.db_async,
+        },
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"{stamp}-{(revision['commit'] or 'nogit')[:10]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"results written to {output}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} scenario(s) regressed by more than {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compare the sync (threadpool) and async (AsyncSession) request paths under load.
+
+Starts one uvicorn server per mode against the configured DATABASE_URL, fires
+concurrent GETs with httpx and prints p50/p99 latency and requests/sec.
+
+    python -m benchmarks.async_vs_sync --concurrency 200 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+
+import httpx
+
+from benchmarks.common import drive, start_server, wait_until_up
+
+
+async def run_load(base_url: str, path: str, total: int, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        return await drive(lambda i: client.get(path), total, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default="/api/cafes")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, db_async in (("sync", False), ("async", True)):
+        proc = start_server(args.port, {"DB_ASYNC": "true" if db_async else "false"})
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            wait_until_up(base_url)
+            # Warm the pool and code paths before measuring
+            asyncio.run(run_load(base_url, args.path, min(200, args.requests), 20))
+            results[mode] = asyncio.run(run_load(base_url, args.path, args.requests, args.concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{mode:>5}: {results[mode]}")
+
+    print(json.dumps({"path": args.path, "concurrency": args.concurrency, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
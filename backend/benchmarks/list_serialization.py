@@ -0,0 +1,133 @@
+"""Time unpaginated 50k-row list responses, and their JSON encoding on its own.
+
+    python -m benchmarks.list_serialization --rows 50000
+
+Seeds --rows cafes and --rows employees (see app/seed.py), then requests
+GET /api/cafes and GET /api/employees without a limit, in-process over httpx's
+ASGI transport with the listing cache off, and prints the median latency.
+
+The encode section takes one page of service output and times only the step
+from dicts to bytes: response_model validation plus dump (what FastAPI does for
+a plain return value) against the encoder the list routes use.
+
+The server section starts a fresh uvicorn process per request variant (the
+in-memory page, ?stream=json, ?stream=ndjson) and reports time to first byte,
+total time and how far the server's peak RSS grew while answering.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import Callable, List
+
+import httpx
+
+from benchmarks.common import start_server, wait_until_up
+
+VARIANTS = ("", "?stream=json", "?stream=ndjson")
+
+def _median_ms(fn: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+async def _time_routes(paths: List[str], repeat: int):
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for path in paths:
+            await client.get(path)  # warm up
+            times, size = [], 0
+            for _ in range(repeat):
+                started = time.perf_counter()
+                r = await client.get(path)
+                times.append(time.perf_counter() - started)
+                r.raise_for_status()
+                size = len(r.content)
+            print(f"  GET {path:<16} median {statistics.median(times) * 1000:8.1f} ms   {len(r.json())} rows, {size / 1e6:.1f} MB")
+
+
+def _time_encoding(repeat: int):
+    from pydantic import TypeAdapter
+    from app.api.dependencies import listing_cache, uow_factory
+    from app.core.serialization import dumps
+    from app.domain.schemas import CafeOut, EmployeeOut
+    from app.services.cafes_service import CafesService
+    from app.services.employees_service import EmployeesService
+
+    pages = {
+        "cafes": (CafesService(uow_factory, listing_cache).list(None)[0], CafeOut),
+        "employees": (EmployeesService(uow_factory, listing_cache).list()[0], EmployeeOut),
+    }
+    for name, (items, model) in pages.items():
+        adapter = TypeAdapter(List[model])
+        validated = _median_ms(lambda: adapter.dump_json(adapter.validate_python(items)), repeat)
+        direct = _median_ms(lambda: dumps(items), repeat)
+        print(f"  {name:<10} response_model {validated:8.1f} ms   direct {direct:8.1f} ms   ({len(items)} rows)")
+
+
+def _peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _time_server(paths: List[str], port: int):
+    base_url = f"http://127.0.0.1:{port}"
+    for path in paths:
+        for variant in VARIANTS:
+            proc = start_server(port, {"CACHE_BACKEND": "none", "LOG_LEVEL": "WARNING", "SLOW_QUERY_MS": "0"})
+            try:
+                wait_until_up(base_url)
+                before = _peak_rss_mb(proc.pid)
+                started = time.perf_counter()
+                first_byte, size = None, 0
+                with httpx.stream("GET", base_url + path + variant, timeout=120) as r:
+                    for chunk in r.iter_raw():
+                        first_byte = first_byte or time.perf_counter() - started
+                        size += len(chunk)
+                total = time.perf_counter() - started
+                growth = _peak_rss_mb(proc.pid) - before
+            finally:
+                proc.terminate()
+                proc.wait()
+            print(f"  GET {path + variant:<30} first byte {first_byte * 1000:8.1f} ms   total {total * 1000:8.1f} ms"
+                  f"   peak RSS +{growth:6.1f} MB   {size / 1e6:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--no-seed", action="store_true", help="Benchmark the data already in the database")
+    args = parser.parse_args()
+
+    # Must be in place before app.* reads Settings
+    os.environ.update({"CACHE_BACKEND": "none", "LOG_LEVEL": "WARNING", "SLOW_QUERY_MS": "0"})
+    if not args.no_seed:
+        from app.db import migrations
+        from app.seed import seed_scaled
+
+        migrations.upgrade()
+        seed_scaled(args.rows, args.rows, args.seed)
+
+    print("routes:")
+    asyncio.run(_time_routes(["/api/cafes", "/api/employees"], args.repeat))
+    print("encoding:")
+    _time_encoding(args.repeat)
+    print("server:")
+    _time_server(["/api/cafes", "/api/employees"], args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Throughput of the production server (gunicorn + uvicorn workers) as workers are added.
+
+For each worker count a fresh gunicorn is started with WEB_WORKERS=n and driven with
+list reads; the table shows requests/s and the speed-up over one worker.
+
+    python -m benchmarks.scaling --max-workers 4 --requests 3000
+
+Scaling tops out at the number of free cores: the load generator runs on this machine
+too, so leave it at least one (taskset/--max-workers). The response cache is disabled
+so every request reaches the database. The database must be seeded (python -m app.cli seed).
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+from typing import Dict, Optional
+
+import httpx
+
+from app.server import available_cpus
+from benchmarks.common import BACKEND_DIR, drive, wait_until_up
+
+PATHS = ("/api/cafes", "/api/employees?limit=50")
+
+
+def start_gunicorn(port: int, workers: int, env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app",
+            "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "WEB_WORKERS": str(workers), "CACHE_BACKEND": "none", "LOG_LEVEL": "WARNING", **(env or {})},
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def measure(base_url: str, total: int, concurrency: int) -> Dict[str, float]:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        # Warm every worker's pool and caches before timing
+        await drive(lambda i: client.get(PATHS[i % len(PATHS)]), concurrency * 4, concurrency)
+        return await drive(lambda i: client.get(PATHS[i % len(PATHS)]), total, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput from 1 to N gunicorn workers")
+    parser.add_argument("--max-workers", type=int, default=available_cpus())
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{available_cpus()} CPUs available")
+    print(f"{'workers':>7} {'rps':>9} {'speed-up':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        proc = start_gunicorn(args.port, workers)
+        try:
+            wait_until_up(base_url)
+            result = asyncio.run(measure(base_url, args.requests, args.concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+        baseline = baseline or result["rps"]
+        print(
+            f"{workers:>7} {result['rps']:>9.1f} {result['rps'] / baseline:>8.2f}x "
+            f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure how long a fresh API process takes to serve traffic.
+
+For each run a new uvicorn process is started and timed from spawn to:
+  listening  /health answers (the app is imported and the socket is bound)
+  ready      /ready answers 200 (database reachable and migrated)
+  first      the first GET /api/cafes completes
+
+    python -m benchmarks.startup --runs 10
+
+Also reports the bare `import app.main` time, which every worker pays.
+The database must already be initialised (python -m app.cli init).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, start_server
+
+POLL_INTERVAL = 0.005
+
+
+def _poll(client: httpx.Client, url: str, started: float, timeout: float) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(POLL_INTERVAL)
+    raise RuntimeError(f"{url} did not answer 200 within {timeout}s")
+
+
+def time_startup(port: int, timeout: float) -> Dict[str, float]:
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = start_server(port, {"LOG_LEVEL": "WARNING"})
+    try:
+        with httpx.Client(timeout=5.0) as client:
+            listening = _poll(client, f"{base_url}/health", started, timeout)
+            ready = _poll(client, f"{base_url}/ready", started, timeout)
+            first = _poll(client, f"{base_url}/api/cafes", started, timeout)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {"listening": listening, "ready": ready, "first": first}
+
+
+def time_import() -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True, env={**os.environ, "LOG_LEVEL": "WARNING"},
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _row(name: str, values: List[float]) -> str:
+    ms = sorted(v * 1000 for v in values)
+    return f"{name:<10} median {statistics.median(ms):8.1f} ms   min {ms[0]:8.1f} ms   max {ms[-1]:8.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-to-first-request of a fresh API process")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    imports = [time_import() for _ in range(args.runs)]
+    runs = [time_startup(args.port, args.timeout) for _ in range(args.runs)]
+    print(_row("import", imports))
+    for key in ("listening", "ready", "first"):
+        print(_row(key, [r[key] for r in runs]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Gunicorn settings for production, all driven by Settings (see app/server.py).
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+On SIGTERM the master stops accepting connections and gives workers WEB_GRACEFUL_TIMEOUT
+seconds to finish in-flight requests before killing them.
+"""
+from app import server
+from app.core.config import settings
+
+bind = f"0.0.0.0:{settings.WEB_PORT}"
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = server.worker_count(settings)
+# Before the app (and its listing cache) is imported, in the master or in each worker
+server.check_cache_backend(settings, workers)
+preload_app = settings.WEB_PRELOAD
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+timeout = settings.WEB_TIMEOUT
+keepalive = settings.WEB_KEEPALIVE
+# The app logs every request itself (app.requests), with its request id
+accesslog = None
+
+
+def post_fork(arbiter, worker):
+    if preload_app:
+        server.after_fork(settings)
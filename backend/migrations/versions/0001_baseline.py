@@ -0,0 +1,53 @@
+"""Baseline: cafes, employees and employee_cafe as originally created by create_all.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases that predate migrations already have these tables (from metadata.create_all);
+    # adopt them as they are and let the following revisions bring them up to date
+    if sa.inspect(op.get_bind()).has_table("cafes"):
+        return
+
+    op.create_table(
+        "cafes",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.String(256), nullable=True),
+        sa.Column("logo_url", sa.String(512), nullable=True),
+        sa.Column("location", sa.String(100), nullable=False),
+    )
+    op.create_table(
+        "employees",
+        sa.Column("id", postgresql.CHAR(9), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("email_address", sa.String(320), nullable=False, unique=True),
+        sa.Column("phone_number", sa.String(20), nullable=False),
+        sa.Column("gender", sa.Enum("Male", "Female", name="gender"), nullable=False),
+        sa.CheckConstraint("char_length(id)=9", name="employee_id_len_9"),
+    )
+    op.create_table(
+        "employee_cafe",
+        sa.Column("employee_id", postgresql.CHAR(9), sa.ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("cafe_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("cafes.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("start_date", sa.Date, nullable=False),
+        sa.UniqueConstraint("employee_id", name="uq_employee_one_cafe"),
+    )
+
+
+def downgrade():
+    op.drop_table("employee_cafe")
+    op.drop_table("employees")
+    op.drop_table("cafes")
+    sa.Enum(name="gender").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,86 @@
+"""Sequence-backed employee ids and the trigger-maintained cafes.employee_count.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+EMPLOYEE_ID_DEFAULT = "'UI' || lpad(nextval('employee_id_seq')::text, 7, '0')"
+
+# Statement-level: one UPDATE per affected cafe per statement, so bulk imports and
+# set-based deletes don't pay a per-row cost
+COUNT_FUNCTION = """
+CREATE OR REPLACE FUNCTION employee_cafe_count_trg() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE cafes c SET employee_count = c.employee_count + d.n
+        FROM (SELECT cafe_id, count(*) AS n FROM new_rows GROUP BY cafe_id) d
+        WHERE c.id = d.cafe_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE cafes c SET employee_count = c.employee_count - d.n
+        FROM (SELECT cafe_id, count(*) AS n FROM old_rows GROUP BY cafe_id) d
+        WHERE c.id = d.cafe_id;
+    ELSE
+        -- Net change per cafe; rows that kept their cafe (e.g. start_date edits) cancel out
+        UPDATE cafes c SET employee_count = c.employee_count + d.n
+        FROM (
+            SELECT cafe_id, sum(n) AS n FROM (
+                SELECT cafe_id, -1 AS n FROM old_rows
+                UNION ALL
+                SELECT cafe_id, 1 FROM new_rows
+            ) moves GROUP BY cafe_id HAVING sum(n) <> 0
+        ) d
+        WHERE c.id = d.cafe_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+TRIGGERS = {
+    "employee_cafe_count_ins": "AFTER INSERT ON employee_cafe REFERENCING NEW TABLE AS new_rows",
+    "employee_cafe_count_del": "AFTER DELETE ON employee_cafe REFERENCING OLD TABLE AS old_rows",
+    "employee_cafe_count_upd": "AFTER UPDATE ON employee_cafe REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+}
+
+
+def upgrade():
+    # Every statement tolerates a database where the app already made the change at startup
+    op.execute("CREATE SEQUENCE IF NOT EXISTS employee_id_seq MINVALUE 1 MAXVALUE 9999999 NO CYCLE")
+    op.execute(f"ALTER TABLE employees ALTER COLUMN id SET DEFAULT {EMPLOYEE_ID_DEFAULT}")
+    # Past every existing UIxxxxxxx id, including ones from the old random generator
+    op.execute(
+        "SELECT setval('employee_id_seq', GREATEST("
+        "(SELECT max(substr(id, 3)::int) FROM employees WHERE id ~ '^UI[0-9]{7}$'), "
+        "(SELECT last_value FROM employee_id_seq WHERE is_called), 1), "
+        "EXISTS (SELECT 1 FROM employees) OR (SELECT is_called FROM employee_id_seq))"
+    )
+
+    op.execute("ALTER TABLE cafes ADD COLUMN IF NOT EXISTS employee_count integer NOT NULL DEFAULT 0")
+    op.execute(COUNT_FUNCTION)
+    # Writers wait from here to commit, so the backfill and the new triggers see the same rows
+    op.execute("LOCK TABLE employee_cafe IN SHARE MODE")
+    for name, timing in TRIGGERS.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON employee_cafe")
+        op.execute(f"CREATE TRIGGER {name} {timing} FOR EACH STATEMENT EXECUTE FUNCTION employee_cafe_count_trg()")
+    op.execute(
+        "UPDATE cafes c SET employee_count = d.n "
+        "FROM (SELECT c2.id, count(ec.employee_id) AS n FROM cafes c2 "
+        "LEFT JOIN employee_cafe ec ON ec.cafe_id = c2.id GROUP BY c2.id) d "
+        "WHERE c.id = d.id AND c.employee_count <> d.n"
+    )
+
+
+def downgrade():
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON employee_cafe")
+    op.execute("DROP FUNCTION IF EXISTS employee_cafe_count_trg()")
+    op.execute("ALTER TABLE cafes DROP COLUMN IF EXISTS employee_count")
+    op.execute("ALTER TABLE employees ALTER COLUMN id DROP DEFAULT")
+    op.execute("DROP SEQUENCE IF EXISTS employee_id_seq")
@@ -0,0 +1,41 @@
+"""Indexes for the cafe listing (per location) and the employee_cafe.cafe_id lookups.
+
+Built CONCURRENTLY so writes to a live database aren't blocked while they build.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # Cafe listing order (employee_count desc, id), unfiltered and filtered by location
+    ("ix_cafes_employee_count_id", "cafes", [sa.text("employee_count DESC"), "id"]),
+    ("ix_cafes_location_employee_count_id", "cafes", ["location", sa.text("employee_count DESC"), "id"]),
+    # ?cafe= employee listing in tenure order, and the staff lookup when cafes are deleted
+    ("ix_employee_cafe_cafe_id_start_date", "employee_cafe", ["cafe_id", "start_date"]),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            # A failed concurrent build leaves an INVALID index behind that IF NOT EXISTS would keep
+            op.execute(
+                f"DO $$ BEGIN IF EXISTS (SELECT 1 FROM pg_index WHERE indexrelid = to_regclass('{name}') "
+                f"AND NOT indisvalid) THEN EXECUTE 'DROP INDEX {name}'; END IF; END $$"
+            )
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,50 @@
+"""Full-text GIN indexes for /api/search over employee name/email and cafe name/location/description.
+
+The expressions must stay identical to EMPLOYEE_SEARCH_DOCUMENT and CAFE_SEARCH_DOCUMENT in
+app/domain/models.py, or the planner can't use the indexes for the search queries.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+EMPLOYEE_DOCUMENT = (
+    "setweight(to_tsvector('simple', name), 'A') || setweight(to_tsvector('simple', email_address), 'B')"
+)
+CAFE_DOCUMENT = (
+    "setweight(to_tsvector('simple', name), 'A') || setweight(to_tsvector('simple', location), 'B') "
+    "|| setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+
+INDEXES = [
+    ("ix_employees_search", "employees", EMPLOYEE_DOCUMENT),
+    ("ix_cafes_search", "cafes", CAFE_DOCUMENT),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, document in INDEXES:
+            # A failed concurrent build leaves an INVALID index behind that IF NOT EXISTS would keep
+            op.execute(
+                f"DO $$ BEGIN IF EXISTS (SELECT 1 FROM pg_index WHERE indexrelid = to_regclass('{name}') "
+                f"AND NOT indisvalid) THEN EXECUTE 'DROP INDEX {name}'; END IF; END $$"
+            )
+            op.create_index(
+                name, table, [sa.text(f"({document})")],
+                postgresql_using="gin", postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,77 @@
+"""Store the /api/search documents in generated columns, with employee emails split into parts.
+
+The text search parser keeps an address as a single token, so 0004's index only matched
+prefixes of the whole address; the document now holds its parts (bob.chen@gmail.com ->
+bob chen gmail com). 0004's indexes were on expressions, so ts_rank re-parsed the text of
+every match; ranking now reads the stored tsvector. The expressions must stay identical to
+the search_document columns in app/domain/models.py.
+
+Adding a stored generated column rewrites the table under an ACCESS EXCLUSIVE lock (a few
+seconds per million rows); the GIN indexes are then built concurrently.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+COLUMN = "search_document"
+
+EMPLOYEE_DOCUMENT = (
+    "setweight(to_tsvector('simple', name), 'A') "
+    "|| setweight(to_tsvector('simple', regexp_replace(email_address, '[@._+-]+', ' ', 'g')), 'B')"
+)
+CAFE_DOCUMENT = (
+    "setweight(to_tsvector('simple', name), 'A') || setweight(to_tsvector('simple', location), 'B') "
+    "|| setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+# 0004's expression indexes, restored by downgrade()
+PREVIOUS_EMPLOYEE_DOCUMENT = (
+    "setweight(to_tsvector('simple', name), 'A') || setweight(to_tsvector('simple', email_address), 'B')"
+)
+
+SEARCH = [
+    # (index, table, document, 0004's indexed expression)
+    ("ix_employees_search", "employees", EMPLOYEE_DOCUMENT, PREVIOUS_EMPLOYEE_DOCUMENT),
+    ("ix_cafes_search", "cafes", CAFE_DOCUMENT, CAFE_DOCUMENT),
+]
+
+
+def _building(index: str) -> str:
+    return f"{index}_new"
+
+
+def upgrade():
+    for _, table, document, _ in SEARCH:
+        op.add_column(table, sa.Column(COLUMN, TSVECTOR, sa.Computed(document, persisted=True)))
+    # Build the replacement next to the old index, then swap names, so search keeps an
+    # index throughout. CREATE/DROP INDEX CONCURRENTLY can't run inside a transaction.
+    with op.get_context().autocommit_block():
+        for index, table, _, _ in SEARCH:
+            op.drop_index(_building(index), table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.create_index(
+                _building(index), table, [COLUMN], postgresql_using="gin", postgresql_concurrently=True,
+            )
+            op.drop_index(index, table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.execute(f"ALTER INDEX {_building(index)} RENAME TO {index}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for index, table, _, previous in SEARCH:
+            op.drop_index(_building(index), table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.create_index(
+                _building(index), table, [sa.text(f"({previous})")],
+                postgresql_using="gin", postgresql_concurrently=True,
+            )
+    for index, table, _, _ in SEARCH:
+        # Drops the index on the column with it
+        op.drop_column(table, COLUMN)
+        op.execute(f"ALTER INDEX {_building(index)} RENAME TO {index}")
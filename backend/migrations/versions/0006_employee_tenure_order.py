@@ -0,0 +1,98 @@
+"""Trigger-maintained employees.start_date and indexes for the employee listing.
+
+The listing orders on start_date (unassigned employees last), then id. On
+employee_cafe.start_date that key spans an outer join, so no index could serve it and
+every page sorted the whole table. employees.start_date is a copy kept by statement-level
+triggers on employee_cafe, like cafes.employee_count (0002).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# Statement-level, like employee_cafe_count_trg: one UPDATE per statement, not per row
+START_DATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION employee_cafe_start_date_trg() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE employees e SET start_date = n.start_date
+        FROM new_rows n
+        WHERE e.id = n.employee_id AND e.start_date IS DISTINCT FROM n.start_date;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE employees e SET start_date = NULL
+        FROM old_rows o
+        WHERE e.id = o.employee_id AND e.start_date IS NOT NULL;
+    ELSE
+        -- An assignment that moved to another employee leaves the old one unassigned
+        UPDATE employees e SET start_date = NULL
+        FROM old_rows o
+        WHERE e.id = o.employee_id AND e.start_date IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM new_rows n WHERE n.employee_id = o.employee_id);
+        UPDATE employees e SET start_date = n.start_date
+        FROM new_rows n
+        WHERE e.id = n.employee_id AND e.start_date IS DISTINCT FROM n.start_date;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+TRIGGERS = {
+    "employee_cafe_start_date_ins": "AFTER INSERT ON employee_cafe REFERENCING NEW TABLE AS new_rows",
+    "employee_cafe_start_date_del": "AFTER DELETE ON employee_cafe REFERENCING OLD TABLE AS old_rows",
+    "employee_cafe_start_date_upd": (
+        "AFTER UPDATE ON employee_cafe REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows"
+    ),
+}
+
+INDEXES = [
+    # Listing order (start_date asc, unassigned last, id); 'infinity' makes the keyset a row comparison
+    ("ix_employees_tenure", [sa.text("coalesce(start_date, 'infinity'::date)"), "id"]),
+    # ?name= prefix filter as lower(name) LIKE 'prefix%'
+    ("ix_employees_name_prefix", [sa.text("lower(name) text_pattern_ops")]),
+]
+
+
+def upgrade():
+    op.execute("ALTER TABLE employees ADD COLUMN IF NOT EXISTS start_date date")
+    op.execute(START_DATE_FUNCTION)
+    # Writers wait from here to commit, so the backfill and the new triggers see the same rows
+    op.execute("LOCK TABLE employee_cafe IN SHARE MODE")
+    for name, timing in TRIGGERS.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON employee_cafe")
+        op.execute(
+            f"CREATE TRIGGER {name} {timing} FOR EACH STATEMENT EXECUTE FUNCTION employee_cafe_start_date_trg()"
+        )
+    op.execute(
+        "UPDATE employees e SET start_date = ec.start_date FROM employee_cafe ec "
+        "WHERE ec.employee_id = e.id AND e.start_date IS DISTINCT FROM ec.start_date"
+    )
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            # A failed concurrent build leaves an INVALID index behind that IF NOT EXISTS would keep
+            op.execute(
+                f"DO $$ BEGIN IF EXISTS (SELECT 1 FROM pg_index WHERE indexrelid = to_regclass('{name}') "
+                f"AND NOT indisvalid) THEN EXECUTE 'DROP INDEX {name}'; END IF; END $$"
+            )
+            op.create_index(name, "employees", columns, postgresql_concurrently=True, if_not_exists=True)
+        # Planner statistics for the new column and the lower(name) expression
+        op.execute("ANALYZE employees")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name="employees", postgresql_concurrently=True, if_exists=True)
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON employee_cafe")
+    op.execute("DROP FUNCTION IF EXISTS employee_cafe_start_date_trg()")
+    op.execute("ALTER TABLE employees DROP COLUMN IF EXISTS start_date")
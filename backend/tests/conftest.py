@@ -0,0 +1,77 @@
+"""Tests run against the Postgres at DATABASE_URL, migrated with `python -m app.cli init`.
+
+Every test works on rows tagged with its `tag` (emails test.<tag>.*, cafe location
+"Test <tag>") and deletes them afterwards, so the suite can run against a database that
+already holds data.
+"""
+import uuid
+import pytest
+from sqlalchemy import text
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.db.session import engine
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1 FROM employees LIMIT 1"))
+    except Exception as e:
+        pytest.skip(f"needs a migrated Postgres at DATABASE_URL: {e.__class__.__name__}")
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def tag(client):
+    tag = uuid.uuid4().hex[:10]
+    yield tag
+    from app.db.session import engine
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM employees WHERE email_address LIKE :p"), {"p": f"test.{tag}.%"})
+        conn.execute(text("DELETE FROM cafes WHERE location = :l"), {"l": f"Test {tag}"})
+
+
+@pytest.fixture
+def make_cafe(client, tag):
+    def make(name="Test Cafe"):
+        r = client.post("/api/cafes", json={"name": name, "location": f"Test {tag}"})
+        assert r.status_code == 201, r.text
+        return r.json()["id"]
+
+    return make
+
+
+@pytest.fixture
+def make_employee(client, tag):
+    count = 0
+
+    def make(cafe_id=None, start_date=None):
+        nonlocal count
+        count += 1
+        payload = {
+            "name": f"Test {count}",
+            "email_address": f"test.{tag}.{count}@example.com",
+            "phone_number": "91234567",
+            "gender": "Female",
+        }
+        if cafe_id:
+            payload.update(cafe_id=cafe_id, start_date=start_date)
+        r = client.post("/api/employees", json=payload)
+        assert r.status_code == 201, r.text
+        return r.json()["id"]
+
+    return make
+
+
+@pytest.fixture
+def db():
+    from app.db.session import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
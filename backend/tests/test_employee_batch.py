@@ -0,0 +1,124 @@
+"""POST /api/employees/batch: atomic rollback, per-item results and assignment changes."""
+from datetime import date
+from sqlalchemy import select
+from app.domain.models import Employee, EmployeeCafe
+
+
+def _batch(client, operations, mode="atomic"):
+    return client.post("/api/employees/batch", json={"mode": mode, "operations": operations})
+
+
+def _create_op(tag, suffix, **extra):
+    return {
+        "op": "create", "name": f"Batch {suffix}", "email_address": f"test.{tag}.{suffix}@example.com",
+        "phone_number": "91234567", "gender": "Male", **extra,
+    }
+
+
+def _employee(db, emp_id):
+    return db.execute(
+        select(Employee.email_address, Employee.phone_number, EmployeeCafe.cafe_id, EmployeeCafe.start_date)
+        .join(EmployeeCafe, EmployeeCafe.employee_id == Employee.id, isouter=True)
+        .where(Employee.id == emp_id)
+    ).one_or_none()
+
+
+def test_atomic_batch_with_a_failure_rolls_back_everything(client, db, tag, make_employee):
+    existing = make_employee()
+    taken_email = f"test.{tag}.1@example.com"
+    r = _batch(client, [
+        _create_op(tag, "new"),
+        {"op": "update", "id": existing, "phone_number": "81234567"},
+        {**_create_op(tag, "dup"), "email_address": taken_email},
+    ])
+
+    assert r.status_code == 409
+    body = r.json()
+    assert body["committed"] is False
+    assert body["applied"] == 0
+    assert [x["status"] for x in body["results"]] == ["rolled_back", "rolled_back", "failed"]
+    assert body["results"][2]["error"] == "email_address: already exists"
+    assert db.scalar(select(Employee.id).where(Employee.email_address == f"test.{tag}.new@example.com")) is None
+    assert _employee(db, existing).phone_number == "91234567"
+
+
+def test_per_item_batch_commits_the_rest_after_a_duplicate_email(client, db, tag, make_cafe, make_employee):
+    cafe = make_cafe()
+    first, second = make_employee(), make_employee()
+    r = _batch(client, [
+        # Fails in the UPDATE itself (unique email), so the batch is retried item by item
+        {"op": "update", "id": first, "email_address": f"test.{tag}.2@example.com"},
+        _create_op(tag, "new", cafe_id=cafe, start_date="2024-01-02"),
+        {"op": "transfer", "id": second, "cafe_id": cafe},
+        {"op": "delete", "id": "UI9999999"},
+    ], mode="per_item")
+
+    assert r.status_code == 200
+    body = r.json()
+    assert body["committed"] is True
+    assert (body["applied"], body["failed"]) == (2, 2)
+    assert [x["status"] for x in body["results"]] == ["failed", "ok", "ok", "failed"]
+    assert "email_address" in body["results"][0]["error"]
+    assert body["results"][3]["error"] == "Employee not found"
+
+    assert _employee(db, first).email_address == f"test.{tag}.1@example.com"
+    created = _employee(db, body["results"][1]["id"])
+    assert (str(created.cafe_id), created.start_date) == (cafe, date(2024, 1, 2))
+    transferred = _employee(db, second)
+    assert (str(transferred.cafe_id), transferred.start_date) == (cafe, date.today())
+
+
+def test_start_date_update_redates_an_existing_assignment(client, db, make_cafe, make_employee):
+    cafe = make_cafe()
+    emp = make_employee(cafe_id=cafe, start_date="2023-05-01")
+    r = _batch(client, [{"op": "update", "id": emp, "start_date": "2022-03-04"}])
+
+    assert r.status_code == 200
+    assert r.json()["results"][0]["status"] == "ok"
+    row = _employee(db, emp)
+    assert (str(row.cafe_id), row.start_date) == (cafe, date(2022, 3, 4))
+
+
+def test_start_date_update_without_an_assignment_fails(client, db, make_cafe, make_employee):
+    cafe = make_cafe()
+    unassigned = make_employee()
+    assigned = make_employee(cafe_id=cafe, start_date="2023-05-01")
+    r = _batch(client, [
+        {"op": "update", "id": unassigned, "start_date": "2022-03-04"},
+        {"op": "update", "id": assigned, "start_date": "2022-03-04"},
+    ], mode="per_item")
+
+    body = r.json()
+    assert [x["status"] for x in body["results"]] == ["failed", "ok"]
+    assert body["results"][0]["error"] == "start_date: no assignment to update"
+    assert _employee(db, unassigned).cafe_id is None
+    assert _employee(db, assigned).start_date == date(2022, 3, 4)
+
+    r = _batch(client, [{"op": "update", "id": unassigned, "start_date": "2022-03-04"}])
+    assert r.status_code == 409
+
+
+def test_import_inserts_valid_rows_and_reports_bad_ones(client, db, tag, make_cafe):
+    cafe = make_cafe()
+    csv = (
+        "name,email_address,phone_number,gender,cafe_id,start_date\n"
+        f"Import A,test.{tag}.a@example.com,91234567,Male,{cafe},2024-02-03\n"
+        f"Import B,test.{tag}.b@example.com,81234567,Female,,\n"
+        f"Import C,test.{tag}.c@example.com,1234,Female,,\n"
+    )
+    r = client.post("/api/employees/import", files={"file": ("employees.csv", csv, "text/csv")})
+
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["inserted"], body["failed"]) == (2, 1)
+    assert body["errors"][0]["row"] == 3
+    rows = db.execute(
+        select(Employee.email_address, EmployeeCafe.cafe_id, EmployeeCafe.start_date)
+        .join(EmployeeCafe, EmployeeCafe.employee_id == Employee.id, isouter=True)
+        .where(Employee.email_address.like(f"test.{tag}.%"))
+        .order_by(Employee.email_address)
+    ).all()
+    assert [(r.email_address, r.cafe_id and str(r.cafe_id), r.start_date) for r in rows] == [
+        (f"test.{tag}.a@example.com", cafe, date(2024, 2, 3)),
+        (f"test.{tag}.b@example.com", None, None),
+    ]
@@ -0,0 +1,47 @@
+"""Rows imported through /import come back unchanged from /export."""
+import csv
+import io
+import json
+
+
+def _import(client, path, filename, body):
+    r = client.post(path, files={"file": (filename, body)})
+    assert r.status_code == 200, r.text
+    assert r.json()["failed"] == 0, r.json()["errors"]
+    return r.json()["inserted"]
+
+
+def test_cafes_round_trip_through_csv(client, tag):
+    rows = [
+        {"name": "Round Trip A", "description": "Has, a comma", "logo_url": "", "location": f"Test {tag}"},
+        {"name": "Round Trip B", "description": 'Says "hi"\non two lines', "logo_url": "/uploads/b.png",
+         "location": f"Test {tag}"},
+    ]
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    assert _import(client, "/api/cafes/import", "cafes.csv", out.getvalue()) == 2
+
+    r = client.get("/api/cafes/export", params={"format": "csv"})
+    assert r.status_code == 200
+    exported = [row for row in csv.DictReader(io.StringIO(r.text)) if row["location"] == f"Test {tag}"]
+    assert sorted(({k: row[k] for k in rows[0]} for row in exported), key=lambda row: row["name"]) == rows
+
+
+def test_employees_round_trip_through_ndjson(client, tag, make_cafe):
+    cafe = make_cafe()
+    rows = [
+        {"name": "Round Trip A", "email_address": f"test.{tag}.a@example.com", "phone_number": "91234567",
+         "gender": "Female", "cafe_id": cafe, "start_date": "2024-02-03"},
+        {"name": "Round Trip B", "email_address": f"test.{tag}.b@example.com", "phone_number": "81234567",
+         "gender": "Male", "cafe_id": None, "start_date": None},
+    ]
+    body = "".join(json.dumps(row) + "\n" for row in rows)
+    assert _import(client, "/api/employees/import", "employees.ndjson", body) == 2
+
+    r = client.get("/api/employees/export", params={"format": "ndjson"})
+    assert r.status_code == 200
+    exported = [json.loads(line) for line in r.text.splitlines() if f"test.{tag}." in line]
+    assert all(row["id"] for row in exported)
+    assert sorted(({k: row[k] for k in rows[0]} for row in exported), key=lambda row: row["name"]) == rows
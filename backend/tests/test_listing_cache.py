@@ -0,0 +1,46 @@
+"""ListingCache with a shared backend and a read replica: loads never pair pre-write rows
+with a post-write revision."""
+from app.core.cache import InMemoryCache
+from app.db.routing import primary_pinned, replica_floor
+from app.services.listing_cache import ListingCache, EMPLOYEES
+
+
+class SharedCache(InMemoryCache):
+    # Stands in for Redis: the only backend whose revisions (and ETags) other workers see
+    shared = True
+
+
+def routing():
+    return primary_pinned.get(), replica_floor.get()
+
+
+def test_loads_after_a_write_need_a_replica_that_replayed_it():
+    positions = iter(["0/10", "0/20"])
+    cache = ListingCache(SharedCache(), write_position=lambda: next(positions))
+
+    # Nothing written yet: any replica will do
+    assert cache.get_or_load(EMPLOYEES, ("a",), routing) == (False, None)
+
+    cache.invalidate(EMPLOYEES)
+    assert cache.get_or_load(EMPLOYEES, ("a",), routing) == (False, "0/10")
+    cache.invalidate(EMPLOYEES)
+    assert cache.get_or_load(EMPLOYEES, ("a",), routing) == (False, "0/20")
+    assert routing() == (False, None)
+
+
+def test_loads_use_the_primary_while_the_write_position_is_unknown():
+    def unavailable():
+        raise ConnectionError("primary unreachable")
+
+    cache = ListingCache(SharedCache(), write_position=unavailable)
+    cache.invalidate(EMPLOYEES)
+
+    assert cache.get_or_load(EMPLOYEES, ("a",), routing) == (True, None)
+    assert routing() == (False, None)
+
+
+def test_per_process_backends_skip_the_tracking():
+    cache = ListingCache(InMemoryCache(), write_position=lambda: "0/10")
+    cache.invalidate(EMPLOYEES)
+
+    assert cache.get_or_load(EMPLOYEES, ("a",), routing) == (False, None)
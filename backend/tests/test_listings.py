@@ -0,0 +1,105 @@
+"""GET /api/employees and /api/cafes: cursor paging, ETags and cafe employee counts."""
+from datetime import date
+
+
+def _pages(client, path, **params):
+    """Every page of a listing, following X-Next-Cursor."""
+    pages = []
+    while True:
+        r = client.get(path, params=params)
+        assert r.status_code == 200, r.text
+        pages.append(r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+        params["cursor"] = cursor
+
+
+def _create(client, tag, suffix, cafe_id=None, start_date=None):
+    r = client.post("/api/employees", json={
+        "name": f"Pager {tag} {suffix}", "email_address": f"test.{tag}.{suffix}@example.com",
+        "phone_number": "91234567", "gender": "Male", "cafe_id": cafe_id, "start_date": start_date,
+    })
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def _counts(client, tag):
+    r = client.get("/api/cafes", params={"location": f"Test {tag}"})
+    assert r.status_code == 200, r.text
+    return {c["id"]: c["employees"] for c in r.json()}
+
+
+def test_cursor_paging_visits_every_employee_once_in_order(client, tag, make_cafe):
+    first, second = make_cafe(), make_cafe()
+    # Ties on start_date, an earlier date in another cafe and unassigned employees, which sort last
+    assigned = {
+        _create(client, tag, "a", first, "2024-01-01"): date(2024, 1, 1),
+        _create(client, tag, "b", first, "2024-01-01"): date(2024, 1, 1),
+        _create(client, tag, "c", second, "2023-06-01"): date(2023, 6, 1),
+        _create(client, tag, "d", first, "2024-01-01"): date(2024, 1, 1),
+    }
+    unassigned = [_create(client, tag, "e"), _create(client, tag, "f")]
+    expected = sorted(assigned, key=lambda emp_id: (assigned[emp_id], emp_id)) + sorted(unassigned)
+
+    pages = _pages(client, "/api/employees", name=f"pager {tag}", limit=2)
+    assert [len(page) for page in pages] == [2, 2, 2]
+    assert [e["id"] for page in pages for e in page] == expected
+
+    pages = _pages(client, "/api/employees", cafe=first, limit=2)
+    assert [e["id"] for page in pages for e in page] == [
+        emp_id for emp_id in expected if emp_id in assigned and assigned[emp_id] == date(2024, 1, 1)
+    ]
+
+
+def test_cursor_paging_visits_every_cafe_once(client, tag, make_cafe, make_employee):
+    cafes = [make_cafe(f"Cafe {i}") for i in range(5)]
+    # Ties on employee count, the listing's sort key
+    for cafe in cafes[:2]:
+        make_employee(cafe_id=cafe)
+
+    pages = _pages(client, "/api/cafes", location=f"Test {tag}", limit=2)
+    seen = [c["id"] for page in pages for c in page]
+    assert len(seen) == len(set(seen))
+    assert set(seen) == set(cafes)
+
+
+def test_matching_if_none_match_is_a_304_until_a_write(client, make_cafe, make_employee):
+    def get(etag=None):
+        return client.get("/api/employees", params={"limit": 1}, headers={"If-None-Match": etag} if etag else {})
+
+    etag = get().headers["ETag"]
+    r = get(etag)
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["ETag"] == etag
+
+    cafe = make_cafe()
+    make_employee(cafe_id=cafe)
+    r = get(etag)
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+    # Employee rows carry their cafe's name, so renaming it changes the employee listing too
+    etag = r.headers["ETag"]
+    assert client.put("/api/cafes", json={"id": cafe, "name": "Renamed"}).status_code == 200
+    assert get(etag).status_code == 200
+
+
+def test_employee_count_follows_inserts_transfers_and_deletes(client, tag, make_cafe, make_employee):
+    first, second = make_cafe(), make_cafe()
+    moving = make_employee(cafe_id=first)
+    leaving = make_employee(cafe_id=first)
+    assert _counts(client, tag) == {first: 2, second: 0}
+
+    r = client.put("/api/employees", json={"id": moving, "cafe_id": second})
+    assert r.status_code == 200, r.text
+    assert _counts(client, tag) == {first: 1, second: 1}
+
+    r = client.delete("/api/employees", params={"id": leaving})
+    assert r.status_code == 200, r.text
+    assert _counts(client, tag) == {first: 0, second: 1}
+
+    r = client.post("/api/employees/delete-many", json={"ids": [moving]})
+    assert r.status_code == 200, r.text
+    assert _counts(client, tag) == {first: 0, second: 0}
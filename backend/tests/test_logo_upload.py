@@ -0,0 +1,40 @@
+"""POST /api/cafes/upload-logo rejects anything but a PNG/JPEG/GIF/WebP within LOGO_MAX_BYTES."""
+import io
+import pytest
+from app.core.config import settings
+
+
+def _upload(client, content, filename="logo.png"):
+    return client.post("/api/cafes/upload-logo", files={"file": (filename, content, "image/png")})
+
+
+def _image(fmt):
+    from PIL import Image
+
+    out = io.BytesIO()
+    Image.new("RGB", (4, 4)).save(out, fmt)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("content, detail", [
+    (b"", "File is empty"),
+    (b"not an image, whatever the name says", "File is not a supported image"),
+])
+def test_non_images_are_rejected(client, content, detail):
+    r = _upload(client, content)
+    assert r.status_code == 400
+    assert r.json()["detail"] == detail
+
+
+def test_unsupported_image_formats_are_rejected(client):
+    r = _upload(client, _image("BMP"), "logo.bmp")
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("Unsupported image format BMP")
+
+
+def test_files_over_the_size_limit_are_rejected(client):
+    # A valid image header, so only the size can be the reason
+    content = _image("PNG")
+    r = _upload(client, content + b"\0" * (settings.LOGO_MAX_BYTES + 1 - len(content)))
+    assert r.status_code == 400
+    assert r.json()["detail"] == "File too large"
@@ -0,0 +1,12 @@
+"""/metrics and the process-wide registry."""
+from app.core.metrics import registry
+from app.main import create_app
+
+
+def test_create_app_twice_replaces_the_pool_collectors():
+    create_app()
+    create_app()
+
+    rendered = registry.render()
+    assert rendered.count("# TYPE db_pool_size gauge") == 1
+    assert 'db_pool_size{engine="sync"}' in rendered